@@ -22,17 +22,63 @@ Defaults:
 from __future__ import annotations
 
 import argparse
-import json
+import mmap
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 
-
-def read_text(path: Path) -> str:
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+	sys.path.insert(0, str(REPO_ROOT))
+
+from FinalJsonConvert.json_stream import (  # type: ignore  # noqa: E402
+	RAW_PLACEHOLDER,
+	JsonArrayWriter,
+	first_significant_byte,
+	iter_records,
+)
+
+# Upper bound on concurrent Lean file reads
+READ_WORKERS = 16
+# Records resolved (and their Lean files read) per thread-pool round
+BATCH_SIZE = 256
+# Output buffer size: json output is many small chunks
+WRITE_BUFFER = 1 << 20
+# Lean files larger than this are read through a read-only memory mapping
+MMAP_THRESHOLD = 1_000_000
+
+
+def read_file_bytes(path: Path) -> bytes:
+	"""Read a whole file; large files are copied straight out of a memory mapping."""
+	with open(path, "rb", buffering=0) as f:
+		if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+			return f.read()
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			return mm[:]
+
+
+def read_lean_bytes(path: Path) -> bytes:
+	"""Return the file's content as UTF-8 bytes, ready to be spliced into the output."""
+	data = read_file_bytes(path)
 	try:
-		return path.read_text(encoding="utf-8")
+		data.decode("utf-8")  # validation only; the str is not kept
 	except UnicodeDecodeError:
 		# Fallback to latin-1 if encoding is unexpected
-		return path.read_text(encoding="latin-1")
+		data = data.decode("latin-1").encode("utf-8")
+	if b"\r" in data:
+		# Same universal-newline translation a text-mode read applies
+		data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+	return data
+
+
+def try_read_lean_bytes(path: Path) -> tuple[bytes | None, Exception | None]:
+	"""Thread-pool friendly `read_lean_bytes` returning (content, error) instead of raising."""
+	try:
+		return read_lean_bytes(path), None
+	except Exception as e:
+		return None, e
 
 
 def process(input_path: Path, output_path: Path) -> int:
@@ -47,56 +93,97 @@ def process(input_path: Path, output_path: Path) -> int:
 	# Where repaired Lean files live: same directory as this script
 	lean_dir = base_dir
 
-	if not input_path.exists():
+	try:
+		head = first_significant_byte(input_path)
+	except FileNotFoundError:
 		print(f"[ERROR] Input JSON not found: {input_path}", file=sys.stderr)
 		return 2
-
-	try:
-		data = json.loads(input_path.read_text(encoding="utf-8"))
 	except Exception as e:
 		print(f"[ERROR] Failed to read/parse JSON {input_path}: {e}", file=sys.stderr)
 		return 3
 
-	if not isinstance(data, list):
+	if head and head != b"[":
 		print(f"[ERROR] Expected a JSON array at top level in {input_path}", file=sys.stderr)
 		return 4
 
-	fixed_items = []
+	# Index repaired Lean files with a single directory pass instead of
+	# probing the filesystem once per JSON record.
+	lean_index: dict[int, str] = {}
+	prefix, suffix = "formalProof_", ".lean"
+	start, stop = len(prefix), -len(suffix)
+	with os.scandir(lean_dir) as it:
+		for entry in it:
+			name = entry.name
+			if name.startswith(prefix) and name.endswith(suffix):
+				id_str = name[start:stop]
+				if id_str.isascii() and id_str.isdigit():
+					lean_index[int(id_str)] = entry.path
+
 	missing_ids = []
+	warnings: list[str] = []  # flushed to stderr in one write at the end
 	total = 0
-
-	for item in data:
-		total += 1
-		if not isinstance(item, dict):
-			continue
-		id_val = item.get("id")
-		if not isinstance(id_val, int):
-			continue
-		lean_file = lean_dir / f"formalProof_{id_val}.lean"
-		if lean_file.exists():
-			try:
-				content = read_text(lean_file)
-			except Exception as e:
-				print(f"[WARN] Failed reading {lean_file}: {e}", file=sys.stderr)
-				missing_ids.append(id_val)
-				continue
-			# Replace formalProof with file content
-			new_item = dict(item)
-			new_item["formalProof"] = content
-			fixed_items.append(new_item)
-		else:
-			missing_ids.append(id_val)
+	parse_error: Exception | None = None
 
 	# Ensure output directory exists
 	output_path.parent.mkdir(parents=True, exist_ok=True)
 
-	# Write output with UTF-8 and nice formatting
-	output_path.write_text(
-		json.dumps(fixed_items, ensure_ascii=False, indent=2) + "\n",
-		encoding="utf-8",
-	)
+	# Records are streamed in batches and written as they are resolved, into a
+	# sibling file that only replaces the output once the input parsed cleanly.
+	part_path = output_path.with_name(output_path.name + ".part")
+	records = iter_records(input_path)
+	with open(part_path, "wb", buffering=WRITE_BUFFER) as f, \
+			ThreadPoolExecutor(max_workers=READ_WORKERS) as ex:
+		writer = JsonArrayWriter(f)
+		while True:
+			try:
+				batch = list(islice(records, BATCH_SIZE))
+			except Exception as e:
+				parse_error = e
+				break
+			if not batch:
+				writer.close()
+				f.write(b"\n")
+				break
+			total += len(batch)
+
+			candidates: list[tuple[dict, int, Path | None]] = []
+			for item in batch:
+				if not isinstance(item, dict):
+					continue
+				id_val = item.get("id")
+				if not isinstance(id_val, int):
+					continue
+				lean_path = lean_index.get(id_val)
+				candidates.append((item, id_val, Path(lean_path) if lean_path is not None else None))
+
+			# Lean reads are independent and I/O-bound: overlap them on the pool.
+			to_read = [lean_file for _, _, lean_file in candidates if lean_file is not None]
+			results = ex.map(try_read_lean_bytes, to_read)
+
+			for item, id_val, lean_file in candidates:
+				if lean_file is None:
+					missing_ids.append(id_val)
+					continue
+				content, err = next(results)
+				if err is not None:
+					warnings.append(f"[WARN] Failed reading {lean_file}: {err}")
+					missing_ids.append(id_val)
+					continue
+				# Replace formalProof with file content, kept as UTF-8 bytes end to end.
+				# Records are not reused after this, so mutate rather than copy.
+				item["formalProof"] = RAW_PLACEHOLDER
+				writer.write(item, raw=content)
+
+	if warnings:
+		sys.stderr.write("\n".join(warnings) + "\n")
+
+	if parse_error is not None:
+		part_path.unlink(missing_ok=True)
+		print(f"[ERROR] {parse_error}", file=sys.stderr)
+		return 3
+	os.replace(part_path, output_path)
 
-	kept = len(fixed_items)
+	kept = writer.count
 	dropped = total - kept
 	print(
 		f"Processed {total} items: kept {kept}, dropped {dropped}. Output: {output_path}")
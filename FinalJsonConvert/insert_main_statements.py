@@ -18,55 +18,170 @@ Usage:
     [--lean-root FinalJsonConvert/Lean] \
     [--outdir FinalJsonConvert/mainStatementJson] \
     [--output-name custom_name.json] \
-    [--overwrite]
+    [--overwrite] [--compact]
 """
 
 from __future__ import annotations
 import argparse
-import json
+import mmap
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Iterable, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from FinalJsonConvert.json_stream import (  # type: ignore  # noqa: E402
+    JsonArrayWriter,
+    first_significant_byte,
+    iter_records,
+)
 
 DEFAULT_LEAN_ROOT = Path("FinalJsonConvert/Lean")
 DEFAULT_OUTDIR = Path("FinalJsonConvert/mainStatementJson")
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # concurrent Lean file reads
+BATCH_SIZE = 256  # records resolved per thread-pool round
+WRITE_BUFFER = 1 << 20  # json output is many small chunks; flush them in bulk
+MMAP_THRESHOLD = 1_000_000  # Lean files above this size are read via mmap
 
 
 def read_text(p: Path) -> str:
     try:
-        return p.read_text(encoding="utf-8")
+        with p.open("rb", buffering=0) as f:
+            if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+                data = f.read()
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[:]
+        text = data.decode("utf-8")
     except Exception as e:
         raise RuntimeError(f"Failed reading {p}: {e}")
-
-
-def load_json(p: Path):
-    try:
-        with p.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        raise RuntimeError(f"Failed loading JSON {p}: {e}")
-
-
-def save_json(obj, p: Path, overwrite: bool = False):
+    if "\r" in text:
+        # Same universal-newline translation as a text-mode read
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def save_json(items: Iterable[Any], p: Path, overwrite: bool = False, compact: bool = False):
+    """
+    Stream `items` into `p` as a JSON array (indent=2, or compact separators
+    when `compact`). Output goes to a sibling `.part` file that replaces `p`
+    only once every item has been written.
+    """
     if p.exists() and not overwrite:
         raise FileExistsError(f"Refusing to overwrite existing file: {p}. Use --overwrite to allow.")
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-
-
-def build_id_to_lean_map(lean_dir: Path) -> dict[int, Path]:
-    mapping: dict[int, Path] = {}
-    for p in lean_dir.glob("formalProof_*.lean"):
-        try:
-            stem = p.stem  # e.g., formalProof_5447
-            id_str = stem.split("_")[1]
+    part = p.with_name(p.name + ".part")
+    try:
+        with part.open("wb", buffering=WRITE_BUFFER) as f:
+            writer = JsonArrayWriter(f, compact=compact)
+            for obj in items:
+                writer.write(obj)
+            writer.close()
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    os.replace(part, p)
+
+
+class LeanIndex:
+    """
+    Lazy id -> `formalProof_<id>.lean` lookup over a single directory.
+
+    Entries are pulled from one streaming `os.scandir` only until the requested
+    id is seen, so JSONs that reference a small subset of the Lean files never
+    walk (or hold in memory) the whole directory.
+    """
+
+    PREFIX = "formalProof_"
+    SUFFIX = ".lean"
+
+    def __init__(self, lean_dir: Path):
+        self._scan = os.scandir(lean_dir)
+        self._map: dict[int, str] = {}
+        self._exhausted = False
+
+    def _pull(self, target: int | None = None) -> bool:
+        """Advance the scan until `target` is indexed (or any id if None)."""
+        if self._exhausted:
+            return False
+        prefix, suffix = self.PREFIX, self.SUFFIX
+        start, stop = len(prefix), -len(suffix)
+        for entry in self._scan:
+            name = entry.name
+            if not (name.startswith(prefix) and name.endswith(suffix)):
+                continue
+            id_str = name[start:stop]
+            if not (id_str.isascii() and id_str.isdigit()):
+                # Skip unexpected filenames
+                continue
             _id = int(id_str)
-            mapping[_id] = p
-        except Exception:
-            # Skip unexpected filenames
-            continue
-    return mapping
+            self._map[_id] = entry.path
+            if target is None or _id == target:
+                return True
+        self.close()
+        return False
+
+    def get(self, _id: int) -> str | None:
+        path = self._map.get(_id)
+        if path is None and self._pull(_id):
+            path = self._map[_id]
+        return path
+
+    def __contains__(self, _id: int) -> bool:
+        return self.get(_id) is not None
+
+    def __bool__(self) -> bool:
+        return bool(self._map) or self._pull()
+
+    def close(self) -> None:
+        if not self._exhausted:
+            self._exhausted = True
+            self._scan.close()
+
+    def __enter__(self) -> "LeanIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def fill_main_statements(records: Iterable[Any], id_to_file: LeanIndex, counts: dict[str, int]) -> Iterator[Any]:
+    """
+    Yield `records` with "main theorem statement" filled in from their Lean
+    files. Records are handled in batches whose file reads run on a thread pool;
+    `counts` tracks "updated" and "missing" as records flow through.
+    """
+    records = iter(records)
+    # Reads are independent and I/O-bound; overlap their syscall latency.
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as ex:
+        while True:
+            batch = list(islice(records, BATCH_SIZE))
+            if not batch:
+                return
+            targets: list[tuple[dict, str]] = []
+            for obj in batch:
+                if not isinstance(obj, dict):
+                    continue
+                _id = obj.get("id")
+                if not isinstance(_id, int):
+                    continue
+                lp = id_to_file.get(_id)
+                if lp is None:
+                    counts["missing"] += 1
+                    continue
+                targets.append((obj, lp))
+
+            texts = ex.map(lambda lp: read_text(Path(lp)), [lp for _, lp in targets])
+            for (obj, _), lean_text in zip(targets, texts):
+                obj["main theorem statement"] = lean_text
+            counts["updated"] += len(targets)
+            yield from batch
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -77,6 +192,7 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--outdir", default=str(DEFAULT_OUTDIR), help="Output directory for updated JSON (default: FinalJsonConvert/mainStatementJson)")
     parser.add_argument("--output-name", default=None, help="Optional explicit output filename. If omitted, uses '<lean-subdir>.<timestamp>.json'.")
     parser.add_argument("--overwrite", action="store_true", help="Allow overwriting existing output file.")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON without indentation (smaller and faster for machine consumers).")
 
     args = parser.parse_args(argv)
 
@@ -85,40 +201,17 @@ def main(argv: list[str] | None = None) -> int:
     outdir = Path(args.outdir)
     lean_dir = lean_root / args.lean_subdir
 
-    if not input_path.exists():
+    # No separate exists() probes: opening the input / scanning the Lean dir
+    # reports a missing path on its own.
+    try:
+        head = first_significant_byte(input_path)
+    except FileNotFoundError:
         print(f"Input JSON not found: {input_path}", file=sys.stderr)
         return 2
-    if not lean_dir.exists():
-        print(f"Lean subdir not found: {lean_dir}", file=sys.stderr)
-        return 2
-
-    data = load_json(input_path)
-    if not isinstance(data, list):
-        print(f"Expected input JSON to be a list of objects, got {type(data)}", file=sys.stderr)
+    if head and head != b"[":
+        print("Expected input JSON to be a list of objects, got a non-array document", file=sys.stderr)
         return 2
 
-    id_to_file = build_id_to_lean_map(lean_dir)
-    if not id_to_file:
-        print(f"No 'formalProof_*.lean' files found in {lean_dir}", file=sys.stderr)
-        return 2
-
-    updated = 0
-    missing = 0
-
-    for idx, obj in enumerate(data):
-        if not isinstance(obj, dict):
-            continue
-        _id = obj.get("id")
-        if not isinstance(_id, int):
-            continue
-        lp = id_to_file.get(_id)
-        if lp is None:
-            missing += 1
-            continue
-        lean_text = read_text(lp)
-        obj["main theorem statement"] = lean_text
-        updated += 1
-
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     if args.output_name:
         output_path = outdir / args.output_name
@@ -127,7 +220,22 @@ def main(argv: list[str] | None = None) -> int:
         safe_sub = str(args.lean_subdir).replace("/", "_")
         output_path = outdir / f"{safe_sub}.{timestamp}.json"
 
-    save_json(data, output_path, overwrite=args.overwrite)
+    counts = {"updated": 0, "missing": 0}
+    try:
+        lean_index = LeanIndex(lean_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        print(f"Lean subdir not found: {lean_dir}", file=sys.stderr)
+        return 2
+
+    with lean_index as id_to_file:
+        if not id_to_file:
+            print(f"No 'formalProof_*.lean' files found in {lean_dir}", file=sys.stderr)
+            return 2
+
+        # Records stream from the input, through the Lean lookup, to the output.
+        records = iter_records(input_path)
+        save_json(fill_main_statements(records, id_to_file, counts), output_path, overwrite=args.overwrite, compact=args.compact)
+    updated, missing = counts["updated"], counts["missing"]
 
     print(f"Done. Updated: {updated}, missing Lean file: {missing}")
     print(f"Output: {output_path}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming JSON helpers shared by the dataset conversion scripts.
+
+- `iter_records` yields the elements of a top-level JSON array one at a time
+  (via ijson when it is installed, else from a full load).
+- `JsonArrayWriter` writes a JSON array incrementally, laid out like
+  json.dump(..., indent=2) or with compact separators, as UTF-8.
+
+orjson is used for encoding/decoding when it is installed. Output is then
+semantically equal to stdlib json's but not always byte-identical:
+- float exponents are spelled without sign/zero padding (`1e-7`, `1e16` where
+  json.dumps writes `1e-07`, `1e+16`);
+- NaN and +/-Infinity are written as `null` (json.dumps writes `NaN`/`Infinity`).
+Values orjson cannot encode at all (integers beyond 64 bits, non-str keys) fall
+back to stdlib json.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+try:
+    import ijson  # optional: stream the input array instead of loading it whole
+except ImportError:
+    ijson = None  # type: ignore
+
+try:
+    import orjson  # optional: much faster JSON encode/decode
+except ImportError:
+    orjson = None  # type: ignore
+
+READ_BUFFER = 1 << 20  # streaming parser input buffer
+
+# Characters json.dumps(..., ensure_ascii=False) escapes inside strings. All are
+# ASCII, so the same escaping applies byte-wise to UTF-8 encoded text.
+_JSON_ESCAPE_RE = re.compile(rb'[\x00-\x1f"\\]')
+_JSON_ESCAPES = {bytes([c]): json.dumps(chr(c)).encode("ascii")[1:-1] for c in range(0x20)}
+_JSON_ESCAPES[b'"'] = b'\\"'
+_JSON_ESCAPES[b"\\"] = b"\\\\"
+# Stand-in value spliced out for raw bytes after encoding (unique per run)
+RAW_PLACEHOLDER = f"\x00raw:{os.urandom(8).hex()}\x00"
+# orjson only holds 64-bit integers and silently turns wider ones into floats;
+# a run of 19 digits (-2**63 already has 19) sends the document to stdlib json.
+# Mapping every digit to "0" and searching for the run is a plain substring
+# scan, much cheaper than a regex over the whole document.
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_WIDE_INT_RUN = b"0" * 19
+
+
+def dumps_json(obj: Any, compact: bool = False) -> bytes:
+    """
+    Encode `obj` as indent=2 UTF-8 JSON (or with no whitespace at all when
+    `compact`), via orjson when it is installed and able to encode `obj`.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj) if compact else orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer beyond 64 bits: stdlib json encodes it
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def loads_json(data: bytes) -> Any:
+    """
+    Decode UTF-8 JSON, via orjson when it is installed and the document has no
+    integers it could lose precision on. NaN/Infinity and other input orjson
+    rejects are retried with stdlib json, which accepts or reports them.
+    """
+    if orjson is not None and _WIDE_INT_RUN not in data.translate(_DIGITS_TO_ZERO):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def json_string_bytes(data: bytes) -> bytes:
+    """Encode UTF-8 `data` as a JSON string literal without decoding it to str."""
+    return b'"' + _JSON_ESCAPE_RE.sub(lambda m: _JSON_ESCAPES[m.group()], data) + b'"'
+
+
+def first_significant_byte(path: Path) -> bytes:
+    """Return the first non-whitespace byte of `path` (b"" for an empty file)."""
+    with open(path, "rb") as f:
+        while True:
+            ch = f.read(1)
+            if not ch or not ch.isspace():
+                return ch
+
+
+def load_array(path: Path) -> list:
+    """Load the whole top-level JSON array in `path`; malformed JSON raises RuntimeError."""
+    try:
+        data = loads_json(Path(path).read_bytes())
+    except ValueError as e:
+        raise RuntimeError(f"Failed loading JSON {path}: {e}") from e
+    if not isinstance(data, list):
+        raise RuntimeError(f"Failed loading JSON {path}: top-level value is not an array")
+    return data
+
+
+def iter_records(path: Path) -> Iterator[Any]:
+    """
+    Yield the elements of the top-level JSON array in `path`, one at a time via
+    ijson when it is installed, else from a full `load_array`.
+    Malformed JSON raises RuntimeError.
+    """
+    if ijson is None:
+        yield from load_array(path)
+        return
+    done = 0
+    try:
+        with open(path, "rb", buffering=READ_BUFFER) as f:
+            for item in ijson.items(f, "item", use_float=True):
+                yield item
+                done += 1
+    except ijson.JSONError:
+        # The C backend rejects valid-for-stdlib input: integers outside 64 bits,
+        # NaN/Infinity, float overflow. Re-parse the whole document the slow way
+        # and resume after the records already handed out (errors still raise).
+        yield from load_array(path)[done:]
+
+
+class JsonArrayWriter:
+    """
+    Incrementally write a JSON array laid out like json.dump(..., indent=2), or
+    with compact separators when `compact`, as UTF-8.
+    """
+
+    def __init__(self, f: BinaryIO, compact: bool = False):
+        self._f = f
+        self._compact = compact
+        self.count = 0
+        self._placeholder = dumps_json(RAW_PLACEHOLDER)
+
+    def write(self, obj: Any, raw: bytes | None = None) -> bytes:
+        """
+        Append `obj` and return its standalone `dumps_json` encoding. If `raw` is
+        given, the value `RAW_PLACEHOLDER` inside `obj` is replaced by `raw`
+        (UTF-8 text) escaped directly at the byte level.
+        """
+        blob = dumps_json(obj, compact=self._compact)
+        if raw is not None:
+            blob = blob.replace(self._placeholder, json_string_bytes(raw), 1)
+        self.write_encoded(blob)
+        return blob
+
+    def write_encoded(self, blob: bytes) -> None:
+        """Append an element already encoded by `dumps_json` (same `compact` setting)."""
+        if self._compact:
+            self._f.write((b"[" if self.count == 0 else b",") + blob)
+        else:
+            # Nested JSON never contains raw newlines inside strings, so re-indenting
+            # the element's own indent=2 dump by two spaces nests it under the array.
+            self._f.write((b"[\n  " if self.count == 0 else b",\n  ") + blob.replace(b"\n", b"\n  "))
+        self.count += 1
+
+    def close(self) -> None:
+        if self.count == 0:
+            self._f.write(b"[]")
+        else:
+            self._f.write(b"]" if self._compact else b"\n]")
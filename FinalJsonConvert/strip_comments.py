@@ -1,11 +1,42 @@
 #!/usr/bin/env python3
 import argparse
+import functools
+import io
 import json
+import os
+import re
 from pathlib import Path
 from typing import Iterable, Any
 
-
-def strip_lean_comments(text: str, preserve_lines: bool = False) -> str:
+try:
+    import orjson  # optional: much faster JSON encode/decode
+except ImportError:
+    orjson = None  # type: ignore
+
+
+# Code-context tokens, tried in order at the current position:
+# string literal, char literal (only when a closing quote follows on the same
+# line, so identifier primes like `mul_mem'` are left alone), block comment
+# start, line comment, a run of ordinary text, or any single character.
+_TOKEN_RE = re.compile(
+    r"""(?P<str>"(?:[^"\\]|\\[\s\S]?)*"?)"""
+    r"""|(?P<chr>'(?=[^'\n]*')(?:[^'\\]|\\[\s\S]?)*'?)"""
+    r"|(?P<open>/-)"
+    r"|(?P<line>--)"
+    r"""|[^"'/-]+"""
+    r"|[\s\S]"
+)
+_NON_NEWLINE_RE = re.compile(r"[^\n]")
+# Line boundaries as understood by str.splitlines()
+_LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+def strip_lean_comments(
+    text: str,
+    preserve_lines: bool = False,
+    remove_blank_lines: bool = False,
+    compact_blank_lines: int | None = None,
+) -> str:
     """
     Remove Lean comments from source text.
     - Single-line comments: "-- ...\n"
@@ -15,114 +46,129 @@ def strip_lean_comments(text: str, preserve_lines: bool = False) -> str:
 
     If preserve_lines=True, newlines inside removed comments are kept, and
     other removed characters become spaces to keep line/column alignment loosely.
+
+    remove_blank_lines / compact_blank_lines apply the same post-processing as
+    `_adjust_blank_lines`, but fused into this pass: output is filtered line by
+    line as it is produced instead of re-splitting the whole stripped text.
+
+    Scanning is driven by a precompiled regex in code context and `str.find`
+    jumps inside comments, so the Python-level loop runs once per token rather
+    than once per character.
     """
     i = 0
     n = len(text)
-    out_chars = []
-
-    in_string = False
-    string_delim = ""
-    escape = False
+    out = io.StringIO()
 
     block_level = 0
 
-    def put(ch: str):
-        out_chars.append(ch)
-
-    def put_removed(ch: str):
-        if preserve_lines and ch == "\n":
-            out_chars.append("\n")
-        elif preserve_lines:
-            out_chars.append(" ")
+    filtering = remove_blank_lines or compact_blank_lines is not None
+    if filtering:
+        compact_max = max(0, compact_blank_lines or 0)
+        line_parts: list[str] = []  # pieces of the current, unfinished line
+        blank_run = 0
+        ends_with_newline = False
+
+        kept_lines = 0
+
+        def keep_line(line: str):
+            # kept lines are "\n"-joined, as in _adjust_blank_lines
+            nonlocal kept_lines
+            if kept_lines:
+                out.write("\n")
+            out.write(line)
+            kept_lines += 1
+
+        def finish_line(line: str):
+            nonlocal blank_run
+            if line.strip() == "":
+                if remove_blank_lines:
+                    return
+                if blank_run < compact_max:
+                    keep_line("")
+                blank_run += 1
+            else:
+                blank_run = 0
+                keep_line(line)
+
+        def put(chunk: str):
+            nonlocal ends_with_newline
+            if not chunk:
+                return
+            ends_with_newline = chunk.endswith("\n")
+            # A held-back trailing '\r' may pair with a leading '\n' here.
+            if line_parts and line_parts[-1].endswith("\r"):
+                if chunk.startswith("\n"):
+                    chunk = chunk[1:]
+                finish_line("".join(line_parts)[:-1])
+                line_parts.clear()
+            pieces = chunk.splitlines(keepends=True)
+            final = len(pieces) - 1
+            for k, piece in enumerate(pieces):
+                last = piece[-1]
+                if last not in _LINE_BREAKS or (last == "\r" and k == final):
+                    # unfinished line (or a trailing '\r' that may become '\r\n')
+                    line_parts.append(piece)
+                    continue
+                line_parts.append(piece[:-2] if piece.endswith("\r\n") else piece[:-1])
+                finish_line("".join(line_parts))
+                line_parts.clear()
+    else:
+        put = out.write
+
+    def put_removed(chunk: str):
+        if preserve_lines:
+            put(_NON_NEWLINE_RE.sub(" ", chunk))
         # else: drop
 
     while i < n:
-        ch = text[i]
-
-        # Inside block comment: consume until matching -/
+        # Inside block comment: jump straight to the nearer of '/-' and '-/'
         if block_level > 0:
-            if ch == "/" and i + 1 < n and text[i + 1] == "-":
-                # potential nested start '/-'
+            c = text.find("-/", i)
+            if c == -1:
+                # unterminated block comment runs to end of input
+                put_removed(text[i:])
+                break
+            o = text.find("/-", i, c + 1)
+            if o != -1:
+                # nested start '/-'
+                put_removed(text[i:o + 2])
                 block_level += 1
-                put_removed("/")
-                put_removed("-")
-                i += 2
-                continue
-            if ch == "-" and i + 1 < n and text[i + 1] == "/":
+                i = o + 2
+            else:
                 # block end '-/'
+                put_removed(text[i:c + 2])
                 block_level -= 1
-                put_removed("-")
-                put_removed("/")
-                i += 2
-                continue
-            put_removed(ch)
-            i += 1
-            continue
-
-        # Not in block; if in string/char literal, just copy
-        if in_string:
-            put(ch)
-            if escape:
-                escape = False
-            else:
-                if ch == "\\":
-                    escape = True
-                elif ch == string_delim:
-                    in_string = False
-                    string_delim = ""
-            i += 1
+                i = c + 2
             continue
 
-        # Detect string or char literal start
-        if ch == '"':
-            in_string = True
-            string_delim = ch
-            put(ch)
-            i += 1
-            continue
-        if ch == "'":
-            # Heuristic: treat as char literal only if there's a closing '\''
-            # before a newline on the same line (e.g., '\'a\'' or '\'\\n\'').
-            # Avoid entering char-literal mode for identifier suffix primes (e.g., mul_mem').
-            j = i + 1
-            found_close_same_line = False
-            while j < n and text[j] != "\n":
-                if text[j] == "'":
-                    found_close_same_line = True
-                    break
-                # allow escapes and any single char; we only care about same-line close
-                j += 1
-            if found_close_same_line:
-                in_string = True
-                string_delim = ch
-                put(ch)
-                i += 1
-                continue
-            # Otherwise, it's likely an identifier prime; treat as normal char
-
-    # Detect start of block comment '/-' or doc '/--'
-        if ch == "/" and i + 1 < n and text[i + 1] == "-":
+        m = _TOKEN_RE.match(text, i)
+        kind = m.lastgroup
+        if kind == "open":
+            # start of block comment '/-' or doc '/--'
             block_level = 1
-            # consume '/-'
-            put_removed("/")
-            put_removed("-")
-            i += 2
-            continue
-
-        # Detect single-line comment '--'
-        if ch == "-" and i + 1 < n and text[i + 1] == "-":
-            # consume until end of line
-            while i < n and text[i] != "\n":
-                put_removed(text[i])
-                i += 1
-            # newline (if any) will be handled below normally
+            put_removed(m.group())
+        elif kind == "line":
+            # single-line comment; the newline (if any) is kept as normal text
+            nl = text.find("\n", i)
+            end = nl if nl != -1 else n
+            if preserve_lines:
+                put(" " * (end - i))
+            i = end
             continue
+        else:
+            # string/char literal or ordinary text: copy as-is
+            put(m.group())
+        i = m.end()
 
-        # Normal character
-        put(ch)
-        i += 1
+    if not filtering:
+        return out.getvalue()
 
-    return "".join(out_chars)
+    if line_parts:
+        last = "".join(line_parts)
+        finish_line(last[:-1] if last.endswith("\r") else last)
+    if ends_with_newline:
+        out.write("\n")
+    return out.getvalue()
 
 
 def _adjust_blank_lines(text: str, remove: bool = False, compact: int | None = None) -> str:
@@ -170,28 +216,48 @@ def iter_lean_files(path: Path) -> Iterable[Path]:
         yield path
         return
     if path.is_dir():
-        for p in path.rglob("*.lean"):
-            if p.is_file():
-                yield p
+        # os.walk is scandir-backed: file/dir classification comes from the
+        # directory listing itself, with no per-entry stat or Path per directory.
+        for root, _dirs, files in os.walk(path):
+            for name in files:
+                if name.endswith(".lean"):
+                    yield Path(root, name)
+
 
+# Statements longer than this bypass the memo cache to bound its memory.
+_STRIP_CACHE_MAX_LEN = 128 * 1024
 
-def _strip_main_statement_in_json(obj: Any, preserve_lines: bool) -> Any:
+
+@functools.lru_cache(maxsize=4096)
+def _strip_cached(text: str, preserve_lines: bool) -> str:
+    return strip_lean_comments(text, preserve_lines=preserve_lines)
+
+
+def _strip_statement(text: str, preserve_lines: bool) -> str:
+    """strip_lean_comments, memoized for the (often repeated) JSON statements."""
+    if len(text) > _STRIP_CACHE_MAX_LEN:
+        return strip_lean_comments(text, preserve_lines=preserve_lines)
+    return _strip_cached(text, preserve_lines)
+
+
+def _strip_main_statement_in_place(obj: Any, preserve_lines: bool) -> None:
     """
-    Recursively traverse JSON-like structures and if an object has a
+    Traverse JSON-like structures and if an object has a
     "main theorem statement" string field, strip Lean comments in-place.
-    Returns the modified object.
+    The structure is mutated rather than rebuilt: loaded JSON is throwaway.
+    Uses an explicit stack, so deep or long inputs cost no Python frames.
     """
-    if isinstance(obj, dict):
-        out = {}
-        for k, v in obj.items():
-            if k == "main theorem statement" and isinstance(v, str):
-                out[k] = strip_lean_comments(v, preserve_lines=preserve_lines)
-            else:
-                out[k] = _strip_main_statement_in_json(v, preserve_lines)
-        return out
-    if isinstance(obj, list):
-        return [_strip_main_statement_in_json(x, preserve_lines) for x in obj]
-    return obj
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k == "main theorem statement" and isinstance(v, str):
+                    node[k] = _strip_statement(v, preserve_lines)
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(node, list):
+            stack.extend(x for x in node if isinstance(x, (dict, list)))
 
 
 def main() -> int:
@@ -211,13 +277,14 @@ def main() -> int:
     # JSON mode: if input is a JSON file, process only the 'main theorem statement' fields and write output JSON
     if args.path.is_file() and args.path.suffix.lower() == ".json":
         try:
-            raw = args.path.read_text(encoding="utf-8")
-            data = json.loads(raw)
+            raw = args.path.read_bytes()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode("utf-8"))
         except Exception as e:
             print(f"ERROR reading JSON {args.path}: {e}")
             return 2
 
-        processed = _strip_main_statement_in_json(data, preserve_lines=args.preserve_lines)
+        _strip_main_statement_in_place(data, preserve_lines=args.preserve_lines)
+        processed = data
 
         # Determine output path
         default_outdir = Path("FinalJsonConvert/strip_mainStatement")
@@ -225,7 +292,10 @@ def main() -> int:
         outdir.mkdir(parents=True, exist_ok=True)
         out_path = outdir / args.path.name
         try:
-            out_path.write_text(json.dumps(processed, ensure_ascii=False, indent=2), encoding="utf-8")
+            if orjson is not None:
+                out_path.write_bytes(orjson.dumps(processed, option=orjson.OPT_INDENT_2))
+            else:
+                out_path.write_text(json.dumps(processed, ensure_ascii=False, indent=2), encoding="utf-8")
             print(f"Stripped main theorem statements: {args.path} -> {out_path}")
         except Exception as e:
             print(f"ERROR writing {out_path}: {e}")
@@ -240,12 +310,13 @@ def main() -> int:
     for src in iter_lean_files(args.path):
         try:
             txt = src.read_text(encoding="utf-8", errors="ignore")
-            stripped = strip_lean_comments(txt, preserve_lines=args.preserve_lines)
-            # Post-process blank lines if requested
-            if args.remove_blank_lines:
-                stripped = _adjust_blank_lines(stripped, remove=True)
-            elif args.compact_blank_lines is not None:
-                stripped = _adjust_blank_lines(stripped, compact=args.compact_blank_lines)
+            # Blank-line post-processing (if requested) is fused into the strip pass
+            stripped = strip_lean_comments(
+                txt,
+                preserve_lines=args.preserve_lines,
+                remove_blank_lines=args.remove_blank_lines,
+                compact_blank_lines=args.compact_blank_lines,
+            )
         except Exception as e:
             print(f"ERROR reading {src}: {e}")
             continue
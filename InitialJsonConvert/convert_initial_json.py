@@ -3,32 +3,109 @@
 from __future__ import annotations
 
 import argparse
-import json
+import contextlib
+import hashlib
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 from datetime import datetime
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
-def load_json(path: Path) -> List[Dict[str, Any]]:
-    """Load a list-based JSON file and fail fast if the structure is unexpected."""
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:  # pragma: no cover - convenience for CLI failures
-        raise SystemExit(f"无法解析 JSON 文件: {exc}") from exc
+from FinalJsonConvert.json_stream import (  # type: ignore  # noqa: E402
+    JsonArrayWriter,
+    first_significant_byte,
+    iter_records,
+)
+
+WRITE_BUFFER = 1 << 20  # pretty JSON is emitted one element at a time
+WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # concurrent Lean file writes
+BATCH_SIZE = 256  # Lean files handed to the pool per round
+
+
+def iter_items(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the elements of a list-based JSON file one at a time.
 
-    if not isinstance(data, list):
+    Streams via ijson when it is installed, so only the current record is held
+    in memory; fails fast if the structure is unexpected.
+    """
+    if first_significant_byte(path) not in (b"[", b""):
         raise SystemExit("输入 JSON 的顶层结构必须是数组 (list)。")
+    try:
+        yield from iter_records(path)
+    except RuntimeError as exc:
+        raise SystemExit(f"无法解析 JSON 文件: {exc.__cause__ or exc}") from exc
+
+
+@dataclass(slots=True)
+class MapEntry:
+    """One exported Lean file and the record it came from."""
+
+    index: int
+    filename: str
+    stem: str
+    path: Path
+    item: Dict[str, Any]
+    blob: bytes | None = None  # the item's dumps_json encoding, if kept (``keep_blobs``)
+
+
+def proof_bytes(text: str) -> bytes:
+    """Encode a proof as newline-terminated UTF-8, ready to be written out."""
+    data = text.encode("utf-8")
+    return data if data.endswith(b"\n") else data + b"\n"
+
+
+def write_lean_file(path: Path, data: bytes) -> None:
+    """Write an encoded Lean file in one unbuffered write."""
+    # The payload is already a single buffer; BufferedWriter would only copy it.
+    with open(path, "wb", buffering=0) as f:
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view):]
+
+
+def _write_lean_job(job: Tuple[Path, bytes]) -> None:
+    write_lean_file(*job)
 
-    return data
 
+def write_lean_files(pool: ThreadPoolExecutor, jobs: List[Tuple[Path, bytes]]) -> None:
+    """Write a batch of ``(path, payload)`` Lean files on ``pool`` and clear it."""
+    for _ in pool.map(_write_lean_job, jobs):
+        pass
+    jobs.clear()
 
-def ensure_newline(text: str) -> str:
-    """Append a trailing newline so exported Lean files are editor-friendly."""
-    return text if text.endswith("\n") else text + "\n"
+
+def _claim_stem(base: str, used: Dict[str, int]) -> str:
+    """Reserve ``base`` (or the next free ``base_<n>``) in ``used`` and return it."""
+    suffix = used.get(base)
+    if suffix is None:
+        used[base] = 1
+        return base
+    candidate = f"{base}_{suffix}"
+    while candidate in used:
+        suffix += 1
+        candidate = f"{base}_{suffix}"
+    used[base] = suffix + 1
+    used[candidate] = 1
+    return candidate
 
 
-def make_lean_filename(item: Dict[str, Any], index: int, used: set[str]) -> str:
-    """Build a stable filename using available identifiers, avoiding collisions."""
+def make_lean_filename(
+    item: Dict[str, Any], index: int, used: Dict[str, int], payload: bytes | None = None
+) -> str:
+    """Build a stable filename using available identifiers, avoiding collisions.
+
+    ``used`` maps every stem handed out so far to the next ``_<n>`` suffix to
+    try for it. When ``payload`` is given, a repeated id is disambiguated by a
+    5-hex-digit content hash instead, so the name does not depend on how many
+    duplicates came before it; only identical content falls back to ``_<n>``.
+    """
     parts: List[str] = []
     for key in ("id", "task_id", "question_id"):
         value = item.get(key)
@@ -38,60 +115,88 @@ def make_lean_filename(item: Dict[str, Any], index: int, used: set[str]) -> str:
     if not parts:
         parts.append(f"{index + 1:04d}")
     base = f"formalProof_{parts[0]}"
-    candidate = f"{base}.lean"
-    suffix = 1
-    while candidate in used:
-        candidate = f"{base}_{suffix}.lean"
-        suffix += 1
-    used.add(candidate)
-    return candidate
+    if payload is not None and base in used:
+        base = f"{base}_{hashlib.blake2b(payload, digest_size=3).hexdigest()[:5]}"
+    return f"{_claim_stem(base, used)}.lean"
+
+
+def looks_pretty(path: Path) -> bool:
+    """Whether ``path`` already starts like a two-space indented array of objects."""
+    with path.open("rb") as f:
+        head = f.read(4096)
+    return head.lstrip().startswith(b"[\n  {")
 
 
 def write_outputs(
-    data: List[Dict[str, Any]], json_output: Path, lean_dir: Path
-) -> List[Dict[str, Any]]:
+    data: Iterable[Dict[str, Any]],
+    json_output: Path,
+    lean_dir: Path,
+    source: Path | None = None,
+    keep_blobs: bool = False,
+) -> List[MapEntry]:
+    """Re-emit ``data`` as pretty JSON and export each proof, in a single pass.
+
+    ``data`` may be a lazy iterator (see ``iter_items``); the JSON is streamed
+    to a ``.part`` sibling that only replaces ``json_output`` once complete.
+    When ``source`` is given (an input already in the target layout), its bytes
+    are copied to ``json_output`` instead and ``data`` only drives the export.
+    With ``keep_blobs`` each entry keeps its item's encoded JSON, so a later
+    lean check can regroup records without re-encoding them.
+    """
     json_output.parent.mkdir(parents=True, exist_ok=True)
     lean_dir.mkdir(parents=True, exist_ok=True)
 
-    json_output.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-
-    used_names: set[str] = set()
-    mapping: List[Dict[str, Any]] = []
-    for index, item in enumerate(data):
-        proof = item.get("formalProof")
-        if not proof:
-            continue
-        name = make_lean_filename(item, index, used_names)
-        path = lean_dir / name
-        path.write_text(ensure_newline(proof), encoding="utf-8")
-        mapping.append(
-            {
-                "index": index,
-                "filename": name,
-                "stem": Path(name).stem,
-                "path": path,
-                "item": item,
-            }
-        )
+    used_names: Dict[str, int] = {}
+    mapping: List[MapEntry] = []
+    # Filenames are assigned serially (deterministic); the writes themselves
+    # are independent and go to a thread pool in batches.
+    jobs: List[Tuple[Path, bytes]] = []
+    part = json_output.with_name(json_output.name + ".part")
+    try:
+        with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as pool, contextlib.ExitStack() as stack:
+            writer = None
+            if source is None:
+                f = stack.enter_context(part.open("wb", buffering=WRITE_BUFFER))
+                writer = JsonArrayWriter(f)
+            else:
+                # copyfile goes through os.sendfile on Linux
+                shutil.copyfile(source, part)
+            for index, item in enumerate(data):
+                blob = writer.write(item) if writer is not None else None
+                if not keep_blobs:
+                    blob = None
+                proof = item.get("formalProof")
+                if not proof:
+                    continue
+                payload = proof_bytes(proof)
+                name = make_lean_filename(item, index, used_names, payload)
+                path = lean_dir / name
+                jobs.append((path, payload))
+                if len(jobs) >= BATCH_SIZE:
+                    write_lean_files(pool, jobs)
+                mapping.append(MapEntry(index, name, name[: -len(".lean")], path, item, blob))
+            write_lean_files(pool, jobs)
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    os.replace(part, json_output)
     return mapping
 
 
-def convert(input_path: Path, output_root: Path) -> Dict[str, Any]:
-    data = load_json(input_path)
-
+def convert(input_path: Path, output_root: Path, *, keep_blobs: bool = False) -> Dict[str, Any]:
     # Keep pretty JSON under a stable path, but put Lean files
     # into a timestamped folder: formalProofYYYYMMDD_HHMMSS
     json_output = output_root / "json" / input_path.name
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     lean_dir = output_root / f"formalProof{ts}"
 
-    mapping = write_outputs(data, json_output, lean_dir)
+    source = input_path if looks_pretty(input_path) else None
+    mapping = write_outputs(iter_items(input_path), json_output, lean_dir, source=source, keep_blobs=keep_blobs)
     return {
         "json_output": json_output,
         "lean_dir": lean_dir,
-        "data": data,
         "mapping": mapping,
         "session_name": lean_dir.name,
     }
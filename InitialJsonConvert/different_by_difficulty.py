@@ -3,18 +3,61 @@
 from __future__ import annotations
 
 import argparse
-import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple
 
-from convert_initial_json import ensure_newline, load_json, make_lean_filename
+from convert_initial_json import (
+    BATCH_SIZE,
+    WRITE_BUFFER,
+    WRITE_WORKERS,
+    JsonArrayWriter,
+    MapEntry,
+    iter_items,
+    make_lean_filename,
+    write_lean_files,
+)
 
 DEFAULT_THRESHOLD = 100
 
+# Line boundaries other than "\n" that str.splitlines() also honours.
+_OTHER_LINE_BREAK_BYTES = (b"\r", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e")
+# UTF-8 forms of U+0085/U+2028/U+2029, keyed by their final byte. That byte is
+# probed first: a single-byte `in` is a memchr, a multi-byte one is not.
+_OTHER_LINE_BREAK_SEQS = ((b"\x85", b"\xc2\x85"), (b"\xa8", b"\xe2\x80\xa8"), (b"\xa9", b"\xe2\x80\xa9"))
 
-def count_lines(text: str) -> int:
-    return len(text.splitlines()) if text else 0
+
+def _has_other_line_breaks(data: bytes) -> bool:
+    for sep in _OTHER_LINE_BREAK_BYTES:
+        if sep in data:
+            return True
+    for tail, seq in _OTHER_LINE_BREAK_SEQS:
+        if tail in data and seq in data:
+            return True
+    return False
+
+
+def count_proof_lines(data: bytes) -> int:
+    """``len(text.splitlines())`` for UTF-8 encoded text, without building the line list."""
+    if not data:
+        return 0
+    if _has_other_line_breaks(data):
+        return len(data.decode("utf-8").splitlines())
+    return data.count(b"\n") + (not data.endswith(b"\n"))
+
+
+def _measure_proof(item: Dict[str, Any]) -> Tuple[int, bytes | None]:
+    """Line count of the item's proof and its Lean payload (None if not exported)."""
+    proof = item.get("formalProof")
+    if not isinstance(proof, str):
+        return 0, None
+    raw = proof.encode("utf-8")
+    lines = count_proof_lines(raw)
+    if not proof or proof.isspace():
+        return lines, None
+    return lines, raw if raw.endswith(b"\n") else raw + b"\n"
 
 
 def partition_items(
@@ -26,44 +69,57 @@ def partition_items(
     normal: List[Dict[str, Any]] = []
     for item in data:
         proof = item.get("formalProof")
-        lines = count_lines(proof) if isinstance(proof, str) else 0
+        lines = count_proof_lines(proof.encode("utf-8")) if isinstance(proof, str) else 0
         target = easy if lines <= threshold else normal
         target.append(item)
     return easy, normal
 
 
-def export_group(
-    items: List[Dict[str, Any]],
-    *,
-    base_dir: Path,
-    label: str,
-) -> Tuple[Path, Path, List[Dict[str, Any]]]:
-    json_path = base_dir / f"{label}.json"
-    lean_dir = base_dir / f"{label}_lean"
-    json_path.parent.mkdir(parents=True, exist_ok=True)
-    lean_dir.mkdir(parents=True, exist_ok=True)
-
-    json_path.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    used_names: set[str] = set()
-    mapping: List[Dict[str, Any]] = []
-    for idx, item in enumerate(items):
-        proof = item.get("formalProof")
-        if not isinstance(proof, str) or not proof.strip():
-            continue
-        filename = make_lean_filename(item, idx, used_names)
-        path = lean_dir / filename
-        path.write_text(ensure_newline(proof), encoding="utf-8")
-        mapping.append(
-            {
-                "index": idx,
-                "filename": filename,
-                "stem": Path(filename).stem,
-                "path": path,
-                "item": item,
-            }
-        )
-    return json_path, lean_dir, mapping
+class GroupExport:
+    """A bucket being written: ``<label>.json`` plus one Lean file per proof.
+
+    Items are appended one at a time, so a caller can route a single stream
+    of records into several groups without materializing them. With
+    ``keep_blobs`` each mapping entry keeps its item's encoded JSON.
+    """
+
+    def __init__(self, base_dir: Path, label: str, pool: ThreadPoolExecutor, keep_blobs: bool = False):
+        self.label = label
+        self.json_path = base_dir / f"{label}.json"
+        self.lean_dir = base_dir / f"{label}_lean"
+        self.lean_dir.mkdir(parents=True, exist_ok=True)  # also creates base_dir
+        self.mapping: List[MapEntry] = []
+        self._pool = pool
+        self._keep_blobs = keep_blobs
+        self._used: Dict[str, int] = {}
+        self._jobs: List[Tuple[Path, bytes]] = []
+        self._f = self.json_path.open("wb", buffering=WRITE_BUFFER)
+        self._writer = JsonArrayWriter(self._f)
+
+    @property
+    def count(self) -> int:
+        return self._writer.count
+
+    def add(self, item: Dict[str, Any], payload: bytes | None) -> None:
+        idx = self._writer.count
+        blob = self._writer.write(item)
+        if payload is None:
+            return
+        filename = make_lean_filename(item, idx, self._used, payload)
+        path = self.lean_dir / filename
+        self._jobs.append((path, payload))
+        if len(self._jobs) >= BATCH_SIZE:
+            write_lean_files(self._pool, self._jobs)
+        if not self._keep_blobs:
+            blob = None
+        self.mapping.append(MapEntry(idx, filename, filename[: -len(".lean")], path, item, blob))
+
+    def close(self) -> None:
+        try:
+            write_lean_files(self._pool, self._jobs)
+            self._writer.close()
+        finally:
+            self._f.close()
 
 
 def split_and_export(
@@ -71,34 +127,52 @@ def split_and_export(
     output_root: Path,
     *,
     threshold: int = DEFAULT_THRESHOLD,
+    keep_blobs: bool = False,
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    data = load_json(input_path)
-    easy, normal = partition_items(data, threshold=threshold)
+    """Bucket the input by proof length and export each bucket, in one pass.
 
+    Every record is measured, appended to its bucket's JSON and queued for its
+    Lean file as it streams in; no per-bucket item lists are kept.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     session_name = f"split_{timestamp}"
     base_dir = output_root / "difficulty" / session_name
     base_dir.mkdir(parents=True, exist_ok=True)
 
+    try:
+        with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as pool:
+            easy = GroupExport(base_dir, "easy", pool, keep_blobs=keep_blobs)
+            normal = GroupExport(base_dir, "normal", pool, keep_blobs=keep_blobs)
+            try:
+                for item in iter_items(input_path):
+                    lines, payload = _measure_proof(item)
+                    (easy if lines <= threshold else normal).add(item, payload)
+            finally:
+                easy.close()
+                normal.close()
+    except BaseException:
+        # Input errors surface mid-stream; don't leave a half-written session.
+        shutil.rmtree(base_dir, ignore_errors=True)
+        raise
+    total = easy.count + normal.count
+
     groups = []
     metadata_groups: List[Dict[str, Any]] = []
-    for label, subset in ("easy", easy), ("normal", normal):
-        json_path, lean_dir, mapping = export_group(subset, base_dir=base_dir, label=label)
+    for group in easy, normal:
         groups.append(
             {
-                "label": label,
-                "count": len(subset),
-                "json_path": str(json_path),
-                "lean_dir": str(lean_dir),
+                "label": group.label,
+                "count": group.count,
+                "json_path": str(group.json_path),
+                "lean_dir": str(group.lean_dir),
             }
         )
         metadata_groups.append(
             {
-                "label": label,
-                "items": subset,
-                "json_path": json_path,
-                "lean_dir": lean_dir,
-                "mapping": mapping,
+                "label": group.label,
+                "json_path": group.json_path,
+                "lean_dir": group.lean_dir,
+                "mapping": group.mapping,
             }
         )
 
@@ -106,7 +180,7 @@ def split_and_export(
         "base_dir": str(base_dir),
         "groups": groups,
         "threshold": threshold,
-        "total": len(data),
+        "total": total,
         "session_name": session_name,
     }
     metadata = {
@@ -114,7 +188,7 @@ def split_and_export(
         "groups": metadata_groups,
         "session_name": session_name,
         "threshold": threshold,
-        "total": len(data),
+        "total": total,
     }
     return result, metadata
 
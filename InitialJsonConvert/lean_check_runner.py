@@ -3,55 +3,115 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Tuple
 
 BASE_DIR = Path(__file__).resolve().parent
 REPO_ROOT = BASE_DIR.parent
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
 
 from LeanCheck.parallel_build_checker import run_parallel_build_check  # type: ignore
+from convert_initial_json import MapEntry
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
 
-def _copy_selected_files(stems: Iterable[str], mapping: List[Dict[str, Any]], dest: Path) -> None:
-    dest.mkdir(parents=True, exist_ok=True)
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # concurrent Lean file copies
+WRITE_BUFFER = 1 << 20  # JSON arrays are streamed one element at a time
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _entry_blob(entry: MapEntry) -> bytes:
+    """The item's ``_dumps`` encoding, reusing the one cached at export time."""
+    blob = entry.blob
+    return blob if blob is not None else _dumps(entry.item)
+
+
+def _write_json_array(path: Path, entries: Iterable[MapEntry]) -> None:
+    """Write the entries' items laid out like ``_dumps([...])``, from cached blobs."""
+    with path.open("wb", buffering=WRITE_BUFFER) as f:
+        sep = b"[\n  "
+        for entry in entries:
+            f.write(sep + _entry_blob(entry).replace(b"\n", b"\n  "))
+            sep = b",\n  "
+        f.write(b"[]" if sep == b"[\n  " else b"\n]")
+
+
+def _copy_one(job: Tuple[Path, Path]) -> None:
+    """Hard-link ``src`` to ``dst``, falling back to a byte copy across devices."""
+    src, dst = job
+    try:
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            os.unlink(dst)
+            os.link(src, dst)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        # copyfile goes through os.sendfile on Linux
+        shutil.copyfile(src, dst)
+
+
+def _copy_selected_files(stems: Iterable[str], mapping: List[MapEntry], dest: Path) -> None:
     stem_set = set(stems)
-    for entry in mapping:
-        if entry["stem"] in stem_set:
-            src = Path(entry["path"])
-            if src.exists():
-                shutil.copy2(src, dest / entry["filename"])
+    jobs = [
+        (entry.path, dest / entry.filename)
+        for entry in mapping
+        if entry.stem in stem_set
+    ]
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        for _ in pool.map(_copy_one, jobs):
+            pass
 
 
 def _run_group(
     *,
     label: str,
     lean_dir: Path,
-    mapping: List[Dict[str, Any]],
+    mapping: List[MapEntry],
     log_root: Path,
     success_root: Path,
     failed_root: Path,
     max_workers: int,
+    executor: ThreadPoolExecutor | None = None,
 ) -> Dict[str, Any]:
+    # The roots already exist (run_leancheck), so no parents= walk is needed;
+    # run_parallel_build_check creates group_log_dir itself.
     group_log_dir = log_root / label
-    group_log_dir.mkdir(parents=True, exist_ok=True)
     success_group_dir = success_root / label
     failed_group_dir = failed_root / label
-    success_group_dir.mkdir(parents=True, exist_ok=True)
-    failed_group_dir.mkdir(parents=True, exist_ok=True)
+    success_group_dir.mkdir(exist_ok=True)
+    failed_group_dir.mkdir(exist_ok=True)
 
     summary = run_parallel_build_check(
         lean_dir,
         group_log_dir,
         max_workers=max_workers,
         pattern="*.lean",
+        executor=executor,
     )
 
-    success_ids = set(summary.get("successful_blocks", []))
-    failed_ids = set(summary.get("failed_blocks", []))
+    # Already sorted (and unique: one stem per file) by run_parallel_build_check
+    success_ids: List[str] = summary.get("successful_blocks", [])
+    failed_ids: List[str] = summary.get("failed_blocks", [])
 
     _copy_selected_files(success_ids, mapping, success_group_dir)
     _copy_selected_files(failed_ids, mapping, failed_group_dir)
@@ -71,8 +131,8 @@ def _run_group(
         "failed_rate": failed_rate,
         "error_count": failed_count,
         "error_rate": failed_rate,
-        "failed_ids": sorted(failed_ids),
-        "success_ids": sorted(success_ids),
+        "failed_ids": failed_ids,
+        "success_ids": success_ids,
         "logs_dir": str(group_log_dir),
         "summary_file": str(group_log_dir / "build_summary.json"),
         "success_dir": str(success_group_dir),
@@ -101,96 +161,89 @@ def run_leancheck(
     success_root = lean_check_dir / "success"
     failed_root = lean_check_dir / "failed"
     lean_check_dir.mkdir(parents=True, exist_ok=True)
-    log_root.mkdir(parents=True, exist_ok=True)
-    success_root.mkdir(parents=True, exist_ok=True)
-    failed_root.mkdir(parents=True, exist_ok=True)
+    log_root.mkdir(exist_ok=True)
+    success_root.mkdir(exist_ok=True)
+    failed_root.mkdir(exist_ok=True)
 
     group_summaries: List[Dict[str, Any]] = []
-    aggregate_failed: List[str] = []
+    aggregate_failed: set[str] = set()
     aggregate_success = 0
-    all_items: List[Dict[str, Any]] = []
-    all_success_items: List[Dict[str, Any]] = []
-    all_failed_items: List[Dict[str, Any]] = []
-
-    for group in groups:
-        label = group.get("label", "default")
-        lean_dir = Path(group["lean_dir"])
-        mapping = group.get("mapping", [])
-        stem_lookup = {entry["stem"]: entry for entry in mapping}
-
-        if not mapping:
-            success_dir = success_root / label
-            failed_dir = failed_root / label
-            success_dir.mkdir(parents=True, exist_ok=True)
-            failed_dir.mkdir(parents=True, exist_ok=True)
-            group_summaries.append(
-                {
-                    "label": label,
-                    "total": 0,
-                    "success": 0,
-                    "failed": 0,
-                    "success_rate": 0.0,
-                    "failed_rate": 0.0,
-                    "error_count": 0,
-                    "error_rate": 0.0,
-                    "failed_ids": [],
-                    "success_ids": [],
-                    "logs_dir": str(log_root / label),
-                    "summary_file": None,
-                    "success_dir": str(success_dir),
-                    "failed_dir": str(failed_dir),
-                    "group_json": None,
-                    "success_json": None,
-                    "failed_json": None,
-                    "skipped": True,
-                }
+    all_entries: List[MapEntry] = []
+    all_success_entries: List[MapEntry] = []
+    all_failed_entries: List[MapEntry] = []
+
+    # One build pool for every group instead of a fresh one per group
+    with ThreadPoolExecutor(max_workers=max_workers) as build_pool:
+        for group in groups:
+            label = group.get("label", "default")
+            lean_dir = Path(group["lean_dir"])
+            mapping = group.get("mapping", [])
+
+            if not mapping:
+                success_dir = success_root / label
+                failed_dir = failed_root / label
+                success_dir.mkdir(exist_ok=True)
+                failed_dir.mkdir(exist_ok=True)
+                group_summaries.append(
+                    {
+                        "label": label,
+                        "total": 0,
+                        "success": 0,
+                        "failed": 0,
+                        "success_rate": 0.0,
+                        "failed_rate": 0.0,
+                        "error_count": 0,
+                        "error_rate": 0.0,
+                        "failed_ids": [],
+                        "success_ids": [],
+                        "logs_dir": str(log_root / label),
+                        "summary_file": None,
+                        "success_dir": str(success_dir),
+                        "failed_dir": str(failed_dir),
+                        "group_json": None,
+                        "success_json": None,
+                        "failed_json": None,
+                        "skipped": True,
+                    }
+                )
+                continue
+
+            summary = _run_group(
+                label=label,
+                lean_dir=lean_dir,
+                mapping=mapping,
+                log_root=log_root,
+                success_root=success_root,
+                failed_root=failed_root,
+                max_workers=max_workers,
+                executor=build_pool,
             )
-            continue
-
-        summary = _run_group(
-            label=label,
-            lean_dir=lean_dir,
-            mapping=mapping,
-            log_root=log_root,
-            success_root=success_root,
-            failed_root=failed_root,
-            max_workers=max_workers,
-        )
-
-        success_items: List[Dict[str, Any]] = []
-        failed_items: List[Dict[str, Any]] = []
-
-        for stem in summary["success_ids"]:
-            entry = stem_lookup.get(stem)
-            if entry:
-                success_items.append(entry["item"])
-        for stem in summary["failed_ids"]:
-            entry = stem_lookup.get(stem)
-            if entry:
-                failed_items.append(entry["item"])
-
-        group_items = success_items + failed_items
-
-        group_json = lean_check_dir / f"{label}.json"
-        group_success_json = lean_check_dir / f"{label}_success.json"
-        group_failed_json = lean_check_dir / f"{label}_failed.json"
-        group_json.write_text(json.dumps(group_items, ensure_ascii=False, indent=2), encoding="utf-8")
-        group_success_json.write_text(json.dumps(success_items, ensure_ascii=False, indent=2), encoding="utf-8")
-        group_failed_json.write_text(json.dumps(failed_items, ensure_ascii=False, indent=2), encoding="utf-8")
-
-        summary["group_json"] = str(group_json)
-        summary["success_json"] = str(group_success_json)
-        summary["failed_json"] = str(group_failed_json)
-
-        group_summaries.append(summary)
-        aggregate_failed.extend(summary.get("failed_ids", []))
-        aggregate_success += summary.get("success", 0)
-        all_items.extend(group_items)
-        all_success_items.extend(success_items)
-        all_failed_items.extend(failed_items)
+
+            stem_lookup = {entry.stem: entry for entry in mapping}
+            success_entries = [stem_lookup[s] for s in summary["success_ids"] if s in stem_lookup]
+            failed_entries = [stem_lookup[s] for s in summary["failed_ids"] if s in stem_lookup]
+
+            group_json = lean_check_dir / f"{label}.json"
+            group_success_json = lean_check_dir / f"{label}_success.json"
+            group_failed_json = lean_check_dir / f"{label}_failed.json"
+            _write_json_array(group_json, chain(success_entries, failed_entries))
+            _write_json_array(group_success_json, success_entries)
+            _write_json_array(group_failed_json, failed_entries)
+
+            summary["group_json"] = str(group_json)
+            summary["success_json"] = str(group_success_json)
+            summary["failed_json"] = str(group_failed_json)
+
+            group_summaries.append(summary)
+            aggregate_failed.update(summary.get("failed_ids", []))
+            aggregate_success += summary.get("success", 0)
+            all_entries.extend(success_entries)
+            all_entries.extend(failed_entries)
+            all_success_entries.extend(success_entries)
+            all_failed_entries.extend(failed_entries)
 
     total_groups_files = sum(gs.get("total", 0) for gs in group_summaries)
-    failed_total = len(set(aggregate_failed))
+    failed_total = len(aggregate_failed)
     failed_rate = (failed_total / total_groups_files * 100) if total_groups_files else 0.0
     success_total = aggregate_success
     success_rate = (success_total / total_groups_files * 100) if total_groups_files else 0.0
@@ -198,9 +251,9 @@ def run_leancheck(
     all_json_path = lean_check_dir / "all_difficult.json"
     all_success_path = lean_check_dir / "all_difficult_success.json"
     all_failed_path = lean_check_dir / "all_difficult_failed.json"
-    all_json_path.write_text(json.dumps(all_items, ensure_ascii=False, indent=2), encoding="utf-8")
-    all_success_path.write_text(json.dumps(all_success_items, ensure_ascii=False, indent=2), encoding="utf-8")
-    all_failed_path.write_text(json.dumps(all_failed_items, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_json_array(all_json_path, all_entries)
+    _write_json_array(all_success_path, all_success_entries)
+    _write_json_array(all_failed_path, all_failed_entries)
 
     return {
         "enabled": True,
@@ -212,7 +265,7 @@ def run_leancheck(
         "failed_rate": failed_rate,
         "error_count": failed_total,
         "error_rate": failed_rate,
-        "failed_ids": sorted(set(aggregate_failed)),
+        "failed_ids": sorted(aggregate_failed),
         "logs_root": str(log_root),
         "lean_check_dir": str(lean_check_dir),
         "success_root": str(success_root),
@@ -15,13 +15,30 @@ Run:
 import json
 import os
 import shutil
+import threading
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import urlparse
-import cgi
 from datetime import datetime
 import sys
 
+try:
+    # Optional: parse multipart uploads in fixed-size chunks straight to disk
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget, ValueTarget
+except ImportError:
+    StreamingFormDataParser = None  # type: ignore
+
+try:
+    import orjson  # optional: faster response encoding
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import cgi  # deprecated, removed in Python 3.13
+except ImportError:
+    cgi = None  # type: ignore
+
 # Ensure repo root is on sys.path so we can import sibling packages like LeanCheck
 BASE = Path(__file__).resolve().parent
 REPO_ROOT = BASE.parent
@@ -33,49 +50,105 @@ PUBLIC_HTML = BASE / 'convert_initial_json_web.html'
 OUTPUT_ROOT = BASE / 'output'
 UPLOADS = BASE / 'uploads'
 UPLOADS.mkdir(parents=True, exist_ok=True)
+UPLOAD_CHUNK = 1 << 20  # request body is fed to the multipart parser in 1 MiB reads
 
 def timestamp_tag() -> str:
     return datetime.now().strftime('%Y%m%d_%H%M%S')
 
 
+def upload_filename(name) -> str:
+    fname = name or 'input.json'
+    fname = fname.replace('\\', '/').split('/')[-1]
+    if not fname.lower().endswith('.json'):
+        fname += '.json'
+    return fname
+
+
 class Handler(SimpleHTTPRequestHandler):
-    def _set_headers(self, code=200, content_type='application/json; charset=utf-8'):
+    # Responses are one pre-encoded body: send it without Nagle delays, and
+    # buffer wfile so headers and body leave in as few writes as possible
+    # (StreamRequestHandler.finish() flushes it).
+    disable_nagle_algorithm = True
+    wbufsize = 1 << 16
+
+    def _set_headers(self, code=200, content_type='application/json; charset=utf-8', length=None):
         self.send_response(code)
         self.send_header('Content-Type', content_type)
+        if length is not None:
+            self.send_header('Content-Length', str(length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+    def _send_json(self, code, payload):
+        if orjson is not None:
+            body = orjson.dumps(payload)
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._set_headers(code, length=len(body))
+        self.wfile.write(body)
+
     def do_OPTIONS(self):
         self._set_headers(200)
 
     def do_GET(self):
         parsed = urlparse(self.path)
         if parsed.path == '/' or parsed.path == '/index.html':
-            if PUBLIC_HTML.exists():
+            try:
+                html = PUBLIC_HTML.open('rb')
+            except FileNotFoundError:
+                self._set_headers(404)
+                self.wfile.write(b'No UI found')
+                return
+            with html:
                 self.send_response(200)
                 self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(os.fstat(html.fileno()).st_size))
                 self.end_headers()
-                self.wfile.write(PUBLIC_HTML.read_bytes())
-                return
-            self._set_headers(404)
-            self.wfile.write(b'No UI found')
+                self.wfile.flush()
+                # Kernel-side copy (os.sendfile) straight from the file to the socket
+                self.connection.sendfile(html)
             return
 
         # Fallback to 404
         self._set_headers(404)
         self.wfile.write(b'{"error":"not found"}')
 
-    def do_POST(self):
-        parsed = urlparse(self.path)
-        if parsed.path not in {'/convert', '/convert-break'}:
-            self._set_headers(404)
-            self.wfile.write(b'{"error":"unknown endpoint"}')
-            return
-        is_break = parsed.path == '/convert-break'
+    def _receive_upload_streaming(self, up_dir: Path):
+        """Stream the multipart body into ``up_dir`` without buffering it whole."""
+        length = int(self.headers.get('Content-Length', '0') or '0')
+        up_dir.mkdir(parents=True, exist_ok=True)
+        # Uploads within the same second share up_dir; keep partial files apart
+        part_path = up_dir / f'.upload-{threading.get_ident()}.part'
+        parser = StreamingFormDataParser(headers=self.headers)
+        file_target = FileTarget(str(part_path))
+        flag_target = ValueTarget()
+        parser.register('file', file_target)
+        parser.register('leancheck', flag_target)
+        try:
+            remaining = length
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK))
+                if not chunk:
+                    break
+                parser.data_received(chunk)
+                remaining -= len(chunk)
+            if remaining:
+                raise ValueError('request body ended early')
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        finally:
+            file_target.finish()  # closes the file even if its part never ended
+        leancheck_flag = flag_target.value.decode('utf-8', 'replace')
+        if not part_path.exists():
+            return None, leancheck_flag
+        up_path = up_dir / upload_filename(file_target.multipart_filename)
+        os.replace(part_path, up_path)
+        return up_path, leancheck_flag
 
-        # Parse multipart/form-data
+    def _receive_upload_cgi(self, up_dir: Path):
         length = int(self.headers.get('Content-Length', '0') or '0')
         env = {
             'REQUEST_METHOD': 'POST',
@@ -85,23 +158,37 @@ class Handler(SimpleHTTPRequestHandler):
         form = cgi.FieldStorage(fp=self.rfile, headers=self.headers, environ=env)
         fld = form['file'] if 'file' in form else None
         leancheck_flag = form.getvalue('leancheck', '')
-        run_lean_check = str(leancheck_flag).lower() not in {'', '0', 'false', 'off', 'no', 'none'}
         if fld is None or not getattr(fld, 'file', None):
-            self._set_headers(400)
-            self.wfile.write(b'{"ok":false,"error":"no file uploaded"}')
-            return
-
-        # Save upload
-        ts = timestamp_tag()
-        up_dir = UPLOADS / f'upload_{ts}'
+            return None, leancheck_flag
         up_dir.mkdir(parents=True, exist_ok=True)
-        fname = getattr(fld, 'filename', '') or 'input.json'
-        fname = fname.replace('\\', '/').split('/')[-1]
-        if not fname.lower().endswith('.json'):
-            fname += '.json'
-        up_path = up_dir / fname
+        up_path = up_dir / upload_filename(getattr(fld, 'filename', ''))
         with open(up_path, 'wb') as f:
             shutil.copyfileobj(fld.file, f)
+        return up_path, leancheck_flag
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        if parsed.path not in {'/convert', '/convert-break'}:
+            self._set_headers(404)
+            self.wfile.write(b'{"error":"unknown endpoint"}')
+            return
+        is_break = parsed.path == '/convert-break'
+
+        # Parse multipart/form-data and save the upload
+        up_dir = UPLOADS / f'upload_{timestamp_tag()}'
+        try:
+            if StreamingFormDataParser is not None:
+                up_path, leancheck_flag = self._receive_upload_streaming(up_dir)
+            else:
+                up_path, leancheck_flag = self._receive_upload_cgi(up_dir)
+        except Exception as e:
+            self._send_json(400, {'ok': False, 'error': f'bad upload: {e}'})
+            return
+        run_lean_check = str(leancheck_flag).lower() not in {'', '0', 'false', 'off', 'no', 'none'}
+        if up_path is None:
+            self._set_headers(400)
+            self.wfile.write(b'{"ok":false,"error":"no file uploaded"}')
+            return
 
         # Run converter
         try:
@@ -110,13 +197,12 @@ class Handler(SimpleHTTPRequestHandler):
             else:
                 from convert_initial_json import convert  # type: ignore
         except Exception as e:
-            self._set_headers(500)
-            self.wfile.write(json.dumps({'ok': False, 'error': f'import error: {e}'}).encode('utf-8'))
+            self._send_json(500, {'ok': False, 'error': f'import error: {e}'})
             return
 
         try:
             if is_break:
-                result, metadata = split_and_export(up_path, OUTPUT_ROOT)
+                result, metadata = split_and_export(up_path, OUTPUT_ROOT, keep_blobs=run_lean_check)
                 payload = {'ok': True}
                 payload.update({k: v for k, v in result.items() if k != 'session_name'})
                 payload['session_name'] = result.get('session_name')
@@ -133,7 +219,7 @@ class Handler(SimpleHTTPRequestHandler):
                     ],
                 }
             else:
-                conversion = convert(up_path, OUTPUT_ROOT)
+                conversion = convert(up_path, OUTPUT_ROOT, keep_blobs=run_lean_check)
                 payload = {
                     'ok': True,
                     'json_output': str(conversion['json_output']),
@@ -171,15 +257,12 @@ class Handler(SimpleHTTPRequestHandler):
             if is_break:
                 for group in metadata['groups']:
                     group.pop('mapping', None)
-            self._set_headers(200)
-            self.wfile.write(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+            self._send_json(200, payload)
         except SystemExit as e:
             # convert() may raise SystemExit on validation error
-            self._set_headers(400)
-            self.wfile.write(json.dumps({'ok': False, 'error': str(e)}).encode('utf-8'))
+            self._send_json(400, {'ok': False, 'error': str(e)})
         except Exception as e:
-            self._set_headers(500)
-            self.wfile.write(json.dumps({'ok': False, 'error': str(e)}).encode('utf-8'))
+            self._send_json(500, {'ok': False, 'error': str(e)})
 
 
 def main():
@@ -15,6 +15,7 @@
   ~/Downloads/supple_formal_statement_5.updated.20250916-231748.export.20250916-234711.json
 """
 import argparse
+import io
 import json
 import os
 import random
@@ -24,6 +25,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson  # 可选：更快的 JSON 解析
+except ImportError:
+    orjson = None  # type: ignore
+
 
 DEFAULT_DOWNLOADS_NAME = "supple_formal_statement_5.updated.20250916-231748.export.20250916-234711.json"
 
@@ -33,19 +39,34 @@ def _default_json_path() -> Path:
     return home / "Downloads" / DEFAULT_DOWNLOADS_NAME
 
 
-def _get(obj: Dict[str, Any], keys: List[str]) -> Optional[str]:
+FORMAL_KEYS = ("formalProof", "formal_proof", "lean", "leanCode", "lean_code", "proof", "code")
+MAIN_KEYS = ("main theorem statement", "main_theorem_statement", "main_theorem", "statement")
+
+
+def _get(obj: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[str]:
     for k in keys:
         v = obj.get(k)
-        if isinstance(v, str) and v.strip():
+        # isspace() 判断全空白，无需像 strip() 那样复制字符串
+        if isinstance(v, str) and v and not v.isspace():
             return v
     return None
 
 
+# splitlines() 认可的除 "\n" 以外的换行符；都不出现时只需数 "\n"
+_OTHER_LINE_BREAKS = ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
+
 def _line_count(s: str) -> int:
-    return len(s.splitlines())
+    """等价于 len(s.splitlines())，但不构造行列表。"""
+    if not s:
+        return 0
+    for sep in _OTHER_LINE_BREAKS:
+        if sep in s:
+            return len(s.splitlines())
+    return s.count("\n") + (not s.endswith("\n"))
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Item:
     idx: int
     id: Any
@@ -56,7 +77,8 @@ class Item:
 
 def load_items(path: Path) -> List[Item]:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        raw = path.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode("utf-8"))
     except Exception as e:
         raise SystemExit(f"无法读取或解析 JSON: {e}")
     if not isinstance(data, list):
@@ -66,14 +88,10 @@ def load_items(path: Path) -> List[Item]:
     for i, obj in enumerate(data):
         if not isinstance(obj, dict):
             continue
-        formal = _get(obj, [
-            "formalProof", "formal_proof", "lean", "leanCode", "lean_code", "proof", "code"
-        ])
+        formal = _get(obj, FORMAL_KEYS)
         if not formal:
             continue
-        main = _get(obj, [
-            "main theorem statement", "main_theorem_statement", "main_theorem", "statement"
-        ])
+        main = _get(obj, MAIN_KEYS)
         items.append(Item(
             idx=i,
             id=obj.get("id", i+1),
@@ -94,8 +112,14 @@ def sample_pairs(
     seed: Optional[int] = None,
 ) -> Tuple[List[Item], List[Item]]:
     rng = random.Random(seed)
-    small = [it for it in items if it.lines < small_max]
-    large = [it for it in items if it.lines > large_min]
+    # 单次遍历完成分桶（阈值重叠时同一条可同时进入两个桶，与原逻辑一致）
+    small: List[Item] = []
+    large: List[Item] = []
+    for it in items:
+        if it.lines < small_max:
+            small.append(it)
+        if it.lines > large_min:
+            large.append(it)
 
     if len(small) < small_count:
         print(f"警告: small(<{small_max}) 可用 {len(small)} < 需要 {small_count}", file=sys.stderr)
@@ -110,13 +134,15 @@ def sample_pairs(
     # 若不足，尝试从其余样本中补齐（不再强制阈值）
     needed = small_count - len(chosen_small)
     if needed > 0:
-        pool = [it for it in items if it not in chosen_small and it not in chosen_large]
+        chosen_ids = {id(it) for it in chosen_small} | {id(it) for it in chosen_large}
+        pool = [it for it in items if id(it) not in chosen_ids]
         rng.shuffle(pool)
         chosen_small += pool[:needed]
 
     needed = large_count - len(chosen_large)
     if needed > 0:
-        pool = [it for it in items if it not in chosen_small and it not in chosen_large]
+        chosen_ids = {id(it) for it in chosen_small} | {id(it) for it in chosen_large}
+        pool = [it for it in items if id(it) not in chosen_ids]
         rng.shuffle(pool)
         chosen_large += pool[:needed]
 
@@ -125,29 +151,26 @@ def sample_pairs(
 
 def to_markdown(small: List[Item], large: List[Item]) -> str:
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    parts: List[str] = []
-    parts.append(f"# Prompt Few-shot 候选样本（{ts}）\n")
-    parts.append(f"- 小样本（formalProof 行数 < 60）：{len(small)} 条")
-    parts.append(f"- 大样本（formalProof 行数 > 100）：{len(large)} 条\n")
+    # 各段以换行开头直接写入同一缓冲区，输出与逐行 "\n".join 完全一致
+    buf = io.StringIO()
+    buf.write(f"# Prompt Few-shot 候选样本（{ts}）\n")
+    buf.write(f"\n- 小样本（formalProof 行数 < 60）：{len(small)} 条")
+    buf.write(f"\n- 大样本（formalProof 行数 > 100）：{len(large)} 条\n")
 
     def block(title: str, items: List[Item]):
-        parts.append(f"## {title}\n")
+        buf.write(f"\n## {title}\n")
         for k, it in enumerate(items, 1):
-            parts.append(f"### {k}. id={it.id}  行数={it.lines}  (idx={it.idx})")
-            parts.append("**FormalProof:**\n")
-            parts.append("```lean")
-            parts.append(it.formal.rstrip())
-            parts.append("```")
-            parts.append("")
-            parts.append("**Main Theorem Statement:**\n")
-            parts.append("```lean")
-            parts.append((it.main or "").rstrip())
-            parts.append("```")
-            parts.append("")
+            buf.write(
+                f"\n### {k}. id={it.id}  行数={it.lines}  (idx={it.idx})"
+                "\n**FormalProof:**\n"
+                f"\n```lean\n{it.formal.rstrip()}\n```\n"
+                "\n**Main Theorem Statement:**\n"
+                f"\n```lean\n{(it.main or '').rstrip()}\n```\n"
+            )
 
     block("小样本 (< 60 行)", small)
     block("大样本 (> 100 行)", large)
-    return "\n".join(parts)
+    return buf.getvalue()
 
 
 def main(argv: List[str]) -> int:
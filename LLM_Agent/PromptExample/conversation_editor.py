@@ -5,17 +5,24 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import random
 import sys
+import threading
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:
+    orjson = None  # type: ignore
+
 BASE_DIR = Path(__file__).parent.resolve()
 DEFAULT_JSON = BASE_DIR / "history.json"
 RANDOM_JSON_DIR = BASE_DIR / "RandomExample" / "jsonData"
 
-FORMAL_KEYS = [
+FORMAL_KEYS = (
     "formalProof",
     "formal_proof",
     "lean",
@@ -23,13 +30,65 @@ FORMAL_KEYS = [
     "lean_code",
     "proof",
     "code",
-]
-MAIN_KEYS = [
+)
+MAIN_KEYS = (
     "main theorem statement",
     "main_theorem_statement",
     "main_theorem",
     "statement",
-]
+)
+
+# Parsed conversations keyed by path, valid while (mtime_ns, size) is unchanged
+_conversation_cache: dict[Path, tuple[tuple[int, int], list]] = {}
+_conversation_cache_lock = threading.Lock()
+# index.html / styles.css bytes, same (mtime_ns, size) validation
+_static_cache: dict[Path, tuple[tuple[int, int], bytes]] = {}
+# RandomExample listing (keyed by the directory's mtime_ns) and per-file
+# candidate entries (keyed by the file's (mtime_ns, size))
+_random_cache: dict = {"stamp": None, "sources": [], "candidates": {}}
+
+
+def _loads(raw: bytes):
+    """Parse UTF-8 JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _dump_messages(messages: list) -> bytes:
+    """Encode `messages` as indent=2 UTF-8 JSON with a trailing newline."""
+    if orjson is not None:
+        return orjson.dumps(messages, option=orjson.OPT_INDENT_2) + b"\n"
+    return (json.dumps(messages, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def _read_static(file_path: Path) -> bytes:
+    """Return the bytes of a static asset, re-reading it only after it changes on disk."""
+    st = file_path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _static_cache.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    data = file_path.read_bytes()
+    _static_cache[file_path] = (stamp, data)
+    return data
+
+
+def _load_conversation(target: Path) -> list:
+    """Parse the message list in `target`, reusing the last parse if the file is unchanged."""
+    st = target.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _conversation_cache_lock:
+        cached = _conversation_cache.get(target)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    raw = target.read_bytes()
+    messages = _loads(raw) if raw.strip() else []
+    if not isinstance(messages, list):
+        raise ValueError("JSON root must be a list of messages")
+    with _conversation_cache_lock:
+        _conversation_cache[target] = (stamp, messages)
+    return messages
 
 
 def _resolve_target(path_value: str | None) -> Path:
@@ -47,30 +106,51 @@ def _resolve_target(path_value: str | None) -> Path:
     return candidate
 
 
-def _extract_field(obj: dict, keys: list[str]) -> str | None:
+def _extract_field(obj: dict, keys: tuple[str, ...]) -> str | None:
     for key in keys:
         val = obj.get(key)
-        if isinstance(val, str) and val.strip():
+        # isspace() tests for all-whitespace without copying like strip() does
+        if isinstance(val, str) and val and not val.isspace():
             return val
     return None
 
 
-def _sample_random_messages() -> dict:
-    if not RANDOM_JSON_DIR.exists():
-        raise FileNotFoundError("RandomExample/jsonData 目录不存在")
-    sources = [p for p in RANDOM_JSON_DIR.glob("*.json") if p.is_file()]
-    if not sources:
-        raise FileNotFoundError("RandomExample/jsonData 中没有可用的 JSON 文件")
-
-    chosen_file = random.choice(sources)
+def _random_sources() -> list[Path]:
+    """*.json files in RANDOM_JSON_DIR, rescanned only when the directory changes."""
+    try:
+        stamp = RANDOM_JSON_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError("RandomExample/jsonData 目录不存在") from None
+    if _random_cache["stamp"] != stamp:
+        try:
+            with os.scandir(RANDOM_JSON_DIR) as it:
+                # glob("*.json") skips dotfiles; keep that
+                sources = [
+                    Path(entry.path)
+                    for entry in it
+                    if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()
+                ]
+        except NotADirectoryError:
+            sources = []
+        _random_cache["sources"] = sources
+        _random_cache["stamp"] = stamp
+    return _random_cache["sources"]
+
+
+def _random_candidates(source: Path) -> list[tuple[int, str, str | None]]:
+    """(index, formal, main) entries of `source`, re-parsed only after the file changes."""
     try:
-        raw = chosen_file.read_text(encoding="utf-8")
-        data = json.loads(raw)
+        st = source.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = _random_cache["candidates"].get(source)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        data = _loads(source.read_bytes())
     except Exception as exc:
-        raise ValueError(f"无法读取或解析 {chosen_file.name}: {exc}") from exc
+        raise ValueError(f"无法读取或解析 {source.name}: {exc}") from exc
 
     if not isinstance(data, list):
-        raise ValueError(f"{chosen_file.name} 顶层必须是数组(list)")
+        raise ValueError(f"{source.name} 顶层必须是数组(list)")
 
     candidates: list[tuple[int, str, str | None]] = []
     for idx, entry in enumerate(data):
@@ -81,7 +161,17 @@ def _sample_random_messages() -> dict:
             continue
         main = _extract_field(entry, MAIN_KEYS)
         candidates.append((idx, formal, main if main is not None else None))
+    _random_cache["candidates"][source] = (stamp, candidates)
+    return candidates
+
 
+def _sample_random_messages() -> dict:
+    sources = _random_sources()
+    if not sources:
+        raise FileNotFoundError("RandomExample/jsonData 中没有可用的 JSON 文件")
+
+    chosen_file = random.choice(sources)
+    candidates = _random_candidates(chosen_file)
     if not candidates:
         raise ValueError(f"{chosen_file.name} 中没有包含 formalProof 的条目")
 
@@ -108,6 +198,11 @@ def _sample_random_messages() -> dict:
 
 class ConversationHandler(BaseHTTPRequestHandler):
     server_version = "ConversationEditor/0.1"
+    # Saved conversations can be 100 KB+: read request bodies through a large
+    # buffer, and buffer wfile so headers and body go out together
+    # (StreamRequestHandler.finish() flushes it).
+    rbufsize = 1 << 17
+    wbufsize = 1 << 17
 
     def do_GET(self) -> None:  # noqa: N802 (BaseHTTPRequestHandler naming)
         parsed = urlparse(self.path)
@@ -134,10 +229,11 @@ class ConversationHandler(BaseHTTPRequestHandler):
 
     # Serve index/css -------------------------------------------------
     def _serve_file(self, file_path: Path, content_type: str) -> None:
-        if not file_path.exists():
+        try:
+            data = _read_static(file_path)
+        except FileNotFoundError:
             self.send_error(404, "File not found")
             return
-        data = file_path.read_bytes()
         self.send_response(200)
         self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(data)))
@@ -155,19 +251,15 @@ class ConversationHandler(BaseHTTPRequestHandler):
             self._send_json(400, {"error": str(exc)})
             return
 
-        if not target.exists():
+        try:
+            messages = _load_conversation(target)
+        except FileNotFoundError:
             target.parent.mkdir(parents=True, exist_ok=True)
             target.write_text("[]\n", encoding="utf-8")
             messages = []
-        else:
-            try:
-                raw = target.read_text(encoding="utf-8")
-                messages = json.loads(raw) if raw.strip() else []
-                if not isinstance(messages, list):
-                    raise ValueError("JSON root must be a list of messages")
-            except (OSError, ValueError, json.JSONDecodeError) as exc:
-                self._send_json(500, {"error": f"Failed to read JSON: {exc}"})
-                return
+        except (OSError, ValueError) as exc:
+            self._send_json(500, {"error": f"Failed to read JSON: {exc}"})
+            return
 
         self._send_json(200, {"messages": messages, "path": str(target.relative_to(BASE_DIR))})
 
@@ -212,7 +304,7 @@ class ConversationHandler(BaseHTTPRequestHandler):
             normalized.append({"role": role, "content": content})
 
         target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_text(json.dumps(normalized, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        target.write_bytes(_dump_messages(normalized))
         self._send_json(200, {"ok": True, "path": str(target.relative_to(BASE_DIR)), "count": len(normalized)})
 
     def _handle_random_example(self) -> None:
@@ -8,44 +8,304 @@ from __future__ import annotations
 import argparse
 import base64
 import binascii
+import functools
+import gzip
 import json
+import locale
+import logging
 import mimetypes
+import os
+import queue
 import re
 import shutil
+import signal
+import socket
 import subprocess
 import sys
-import uuid
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Any
 
+try:
+    import pybase64  # optional: SIMD base64 decoder for large uploads
+except ImportError:
+    pybase64 = None  # type: ignore
+
+try:
+    import orjson  # optional: faster JSON; parses request bytes without a full-body str copy
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    # Optional: parse multipart uploads in fixed-size chunks straight to disk
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import BaseTarget, ValueTarget
+except ImportError:
+    StreamingFormDataParser = None  # type: ignore
+    BaseTarget = object  # type: ignore
+
+try:
+    import cgi  # deprecated, removed in Python 3.13
+except ImportError:
+    cgi = None  # type: ignore
+
 DEFAULT_PORT = 8765
+DEFAULT_HTTP_THREADS = min(32, (os.cpu_count() or 1) * 2 + 2)
+SOCKET_TIMEOUT = 60  # seconds a connection may sit without sending before its pool worker is freed
 DASHBOARD_HTML = Path(__file__).with_name("manager_dashboard.html")
+_REPO_ROOT = Path(__file__).resolve().parents[1]  # resolved once; __file__ never changes
 CACHE_DIRNAME = ".dashboard_cache"
+UPLOAD_CHUNK = 1 << 16  # multipart request bodies are read in 64 KiB pieces
+MAX_OUTPUT_BYTES = 16 << 20  # default per-stream cap on captured /run output
+OUTPUT_CHUNK = 1 << 16  # subprocess pipes are drained in 64 KiB reads
+UPLOAD_WORKERS = 8  # concurrent decode+write jobs per /upload request
+PREALLOCATE_MIN = 1 << 20  # decoded uploads at least this large get their blocks reserved up front
+_SLUG_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
-
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[1]
+# Request log; serve() routes it through a queue so stderr writes happen on a
+# listener thread instead of the request handlers.
+_log = logging.getLogger("dashboard_server")
 
 
 def _slugify(name: str) -> str:
-    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", name.strip())
+    slug = _SLUG_RE.sub("-", name.strip())
     slug = slug.strip("-._")
     return slug or "upload"
 
 
 def _ensure_relative_path(path_str: str) -> Path:
-    path = Path(path_str)
-    if path.is_absolute():
+    # Plain string checks: this runs once per uploaded file. Backslashes count
+    # as separators and drive prefixes ("C:...") as absolute on every platform.
+    normalized = path_str.replace("\\", "/")
+    if normalized.startswith("/") or normalized[1:2] == ":":
         raise ValueError("path must be relative")
-    parts = [p for p in path.parts if p not in ("", ".")]
-    if any(part == ".." for part in parts):
+    parts = [p for p in normalized.split("/") if p and p != "."]
+    if ".." in parts:
         raise ValueError("path must not traverse upwards")
     if not parts:
         raise ValueError("empty path")
     return Path(*parts)
 
 
+def _loads(raw: bytes) -> Any:
+    """Parse a UTF-8 JSON request body, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(data: Any) -> bytes:
+    """Encode a response payload as UTF-8 JSON, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+def _b64decode(data: str) -> bytes:
+    """Same as base64.b64decode, via pybase64 when it is installed."""
+    if pybase64 is not None:
+        # pybase64's strict mode decodes straight through its SIMD path and is
+        # several times faster than the lenient one, which filters the input
+        # first. Well-formed uploads take the fast path; anything else (line
+        # breaks, stray characters, bad padding) is retried leniently, so what
+        # is accepted or rejected is exactly what the lenient call alone did.
+        try:
+            return pybase64.b64decode(data, validate=True)
+        except binascii.Error:
+            return pybase64.b64decode(data)
+    return base64.b64decode(data)
+
+
+def _fast_write(dest: Path, content: bytes) -> None:
+    """Write `content` to `dest` with raw os.write calls, preallocating large files."""
+    fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if len(content) >= PREALLOCATE_MIN and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, len(content))
+            except OSError:
+                pass  # not supported by this filesystem; plain writes still work
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _ensure_parent(dest: Path, made: set[Path]) -> None:
+    """Create dest's parent directory unless this upload already did."""
+    parent = dest.parent
+    if parent not in made:
+        parent.mkdir(parents=True, exist_ok=True)
+        made.add(parent)
+
+
+def _upload_entry_path(entry: Any) -> Path:
+    """Check the shape of one /upload file entry and return its relative path."""
+    if not isinstance(entry, dict):
+        raise ValueError("each file entry must be an object")
+    rel_path = entry.get("path")
+    if not isinstance(rel_path, str) or not isinstance(entry.get("data"), str):
+        raise ValueError("file entries require string path and data")
+    return _ensure_relative_path(rel_path)
+
+
+def _store_upload_entry(target: Path, made: set[Path], job: tuple[Path, dict]) -> None:
+    """Decode one /upload file entry (checked by `_upload_entry_path`) and write it under `target`."""
+    rel, entry = job
+    # Take the payload out of the entry so the (often MB-sized) base64 str is
+    # freed as soon as this entry is decoded, not when the whole request ends.
+    data = entry.pop("data")
+    encoding = entry.get("encoding", "base64")
+    dest = target / rel
+    _ensure_parent(dest, made)
+    if encoding == "base64":
+        try:
+            content = _b64decode(data)
+        except (ValueError, binascii.Error) as exc:
+            raise ValueError(f"invalid base64 data for {rel}") from exc
+    elif encoding == "text":
+        content = data.encode("utf-8")
+    else:
+        raise ValueError("unsupported encoding")
+    del data
+    _fast_write(dest, content)
+
+
+class _UploadTreeTarget(BaseTarget):
+    """Multipart target that writes every file part to `root / <part filename>`."""
+
+    def __init__(self, root: Path) -> None:
+        super().__init__()
+        self.root = root
+        self.count = 0
+        self._file = None
+        self._made = {root}
+
+    def on_start(self) -> None:
+        dest = self.root / _ensure_relative_path(self.multipart_filename or "")
+        _ensure_parent(dest, self._made)
+        self._file = open(dest, "wb")
+
+    def on_data_received(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def on_finish(self) -> None:
+        self.close()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@functools.lru_cache(maxsize=64)
+def _content_type(path_str: str) -> str:
+    content_type, _ = mimetypes.guess_type(path_str)
+    if not content_type:
+        content_type = "application/octet-stream"
+    if content_type.startswith("text/") and "charset=" not in content_type:
+        content_type = f"{content_type}; charset=utf-8"
+    return content_type
+
+
+# Served files by path, valid while (mtime_ns, size) is unchanged
+# path -> [(mtime_ns, size), raw bytes, gzip bytes or None until first asked for]
+_file_cache: dict[Path, list[Any]] = {}
+
+
+def _read_cached(path: Path, gzipped: bool = False) -> bytes:
+    """Return the bytes of `path` (optionally gzip-compressed), re-reading it only after it changes on disk."""
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _file_cache.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = [stamp, path.read_bytes(), None]
+        _file_cache[path] = cached
+    if not gzipped:
+        return cached[1]
+    if cached[2] is None:
+        # Compressed once per file version; mtime=0 keeps the output stable
+        cached[2] = gzip.compress(cached[1], compresslevel=9, mtime=0)
+    return cached[2]
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (listed without q=0)."""
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() != "gzip":
+            continue
+        q = params.strip().lower()
+        return not (q.startswith("q=") and q[2:].strip().rstrip("0").rstrip(".") in ("", "0"))
+    return False
+
+
+class _TailBuffer:
+    """Keep only the last `cap` bytes written, counting how many were dropped."""
+
+    def __init__(self, cap: int) -> None:
+        self.cap = cap
+        self.size = 0
+        self.dropped = 0
+        self._chunks: deque[bytes] = deque()
+
+    def write(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        while self.size > self.cap:
+            excess = self.size - self.cap
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                cut = len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                cut = excess
+            self.size -= cut
+            self.dropped += cut
+
+    def text(self) -> str:
+        """Decode like subprocess text mode (locale encoding, universal newlines)."""
+        data = b"".join(self._chunks).decode(locale.getpreferredencoding(False), "replace")
+        if "\r" in data:
+            data = data.replace("\r\n", "\n").replace("\r", "\n")
+        if self.dropped:
+            data = f"...<truncated {self.dropped} bytes>...\n{data}"
+        return data
+
+
+def _drain(pipe, buf: _TailBuffer) -> None:
+    fd = pipe.fileno()
+    while True:
+        chunk = os.read(fd, OUTPUT_CHUNK)
+        if not chunk:
+            return
+        buf.write(chunk)
+
+
+def _run_captured(argv: list[str], cwd: str, max_output: int) -> tuple[int, str, str]:
+    """
+    Run `argv` to completion, keeping at most the last `max_output` bytes of
+    each of stdout/stderr, so a chatty command cannot exhaust server memory.
+    """
+    out, err = _TailBuffer(max_output), _TailBuffer(max_output)
+    with subprocess.Popen(argv, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        # Drain both pipes at once so neither can fill up and stall the child
+        stderr_reader = threading.Thread(target=_drain, args=(proc.stderr, err), daemon=True)
+        stderr_reader.start()
+        try:
+            _drain(proc.stdout, out)
+        finally:
+            stderr_reader.join()
+    return proc.returncode, out.text(), err.text()
+
+
 def _safe_rmtree(path: Path) -> None:
     if path.exists():
         shutil.rmtree(path)
@@ -53,6 +313,7 @@ def _safe_rmtree(path: Path) -> None:
 
 class CommandRunnerHandler(BaseHTTPRequestHandler):
     server_version = "DashboardRunner/0.1"
+    timeout = SOCKET_TIMEOUT
 
     def do_OPTIONS(self) -> None:  # noqa: N802 (HTTP verb name)
         self.send_response(204)
@@ -62,9 +323,9 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:  # noqa: N802 (HTTP verb name)
         if self.path in ('/', '/index.html'):
             dashboard: Path = getattr(self.server, 'dashboard', DASHBOARD_HTML)  # type: ignore[attr-defined]
-            if dashboard.exists():
+            try:
                 self._write_file(dashboard)
-            else:
+            except FileNotFoundError:
                 self.send_error(404, 'Dashboard HTML not found')
             return
         if self.path == '/favicon.ico':
@@ -78,17 +339,25 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
         self.send_error(404, 'Not Found')
 
     def do_POST(self) -> None:  # noqa: N802 (HTTP verb name)
-        length = int(self.headers.get("Content-Length", "0"))
+        if self.path == "/upload_stream":
+            # multipart body is consumed incrementally, never read whole
+            self._handle_upload_stream()
+            return
+
+        length = self._content_length()
         if length <= 0:
             self._write_json({"error": "empty request body"}, status=400)
             return
 
         raw = self.rfile.read(length)
         try:
-            payload = json.loads(raw)
-        except json.JSONDecodeError as exc:
+            payload = _loads(raw)
+        except json.JSONDecodeError as exc:  # orjson's error subclasses it
             self._write_json({"error": f"invalid JSON: {exc}"}, status=400)
             return
+        # An /upload body is mostly base64 that now also lives in `payload`;
+        # don't keep the raw copy alive while the files are decoded.
+        del raw
 
         if not isinstance(payload, dict):
             self._write_json({"error": "JSON payload must be an object"}, status=400)
@@ -110,7 +379,7 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
             return
 
         cwd = payload.get("cwd")
-        server_root: Path = getattr(self.server, "root", _repo_root())  # type: ignore[attr-defined]
+        server_root: Path = getattr(self.server, "root", _REPO_ROOT)  # type: ignore[attr-defined]
         if cwd:
             cwd_path = Path(cwd)
             if not cwd_path.is_absolute():
@@ -118,14 +387,9 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
         else:
             cwd_path = server_root
 
+        max_output: int = getattr(self.server, "max_output_bytes", MAX_OUTPUT_BYTES)  # type: ignore[attr-defined]
         try:
-            completed = subprocess.run(
-                argv,
-                cwd=str(cwd_path),
-                capture_output=True,
-                text=True,
-                check=False,
-            )
+            exit_code, stdout, stderr = _run_captured(argv, str(cwd_path), max_output)
         except FileNotFoundError as exc:
             self._write_json({"error": str(exc)}, status=500)
             return
@@ -137,9 +401,9 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
             {
                 "argv": argv,
                 "cwd": str(cwd_path),
-                "exit_code": completed.returncode,
-                "stdout": completed.stdout,
-                "stderr": completed.stderr,
+                "exit_code": exit_code,
+                "stdout": stdout,
+                "stderr": stderr,
             }
         )
 
@@ -153,12 +417,12 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
             self._write_json({"error": "files must be a non-empty list"}, status=400)
             return
 
-        server_root: Path = getattr(self.server, "root", _repo_root())  # type: ignore[attr-defined]
+        server_root: Path = getattr(self.server, "root", _REPO_ROOT)  # type: ignore[attr-defined]
         cache_root: Path = getattr(self.server, "cache_root", server_root / CACHE_DIRNAME)  # type: ignore[attr-defined]
         cache_root.mkdir(parents=True, exist_ok=True)
 
         slug = _slugify(folder)
-        target = cache_root / f"{slug}-{uuid.uuid4().hex[:8]}"
+        target = cache_root / f"{slug}-{os.urandom(4).hex()}"
         try:
             target.mkdir(parents=True, exist_ok=False)
         except FileExistsError:
@@ -167,28 +431,23 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
 
         written = 0
         try:
+            # A later entry for the same path replaces an earlier one, as it did
+            # when entries were written in order; it also means no two workers
+            # ever truncate and write the same file.
+            jobs: dict[Path, dict] = {}
             for entry in files:
-                if not isinstance(entry, dict):
-                    raise ValueError("each file entry must be an object")
-                rel_path = entry.get("path")
-                data = entry.get("data")
-                encoding = entry.get("encoding", "base64")
-                if not isinstance(rel_path, str) or not isinstance(data, str):
-                    raise ValueError("file entries require string path and data")
-                rel = _ensure_relative_path(rel_path)
-                dest = target / rel
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                if encoding == "base64":
-                    try:
-                        content = base64.b64decode(data)
-                    except (ValueError, binascii.Error) as exc:
-                        raise ValueError(f"invalid base64 data for {rel}") from exc
-                elif encoding == "text":
-                    content = data.encode("utf-8")
-                else:
-                    raise ValueError("unsupported encoding")
-                dest.write_bytes(content)
-                written += 1
+                rel = _upload_entry_path(entry)
+                replaced = jobs.get(rel)
+                if replaced is not None:
+                    replaced.pop("data", None)  # free the superseded payload now
+                jobs[rel] = entry
+            # Entries are independent: decode and write them concurrently.
+            # map() yields in order, so the first bad entry is still the one reported.
+            with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(jobs))) as ex:
+                # Files mostly share a few directories; create each one once
+                store = functools.partial(_store_upload_entry, target, {target})
+                for _ in ex.map(store, jobs.items()):
+                    written += 1
         except Exception as exc:
             _safe_rmtree(target)
             self._write_json({"error": str(exc)}, status=400)
@@ -210,64 +469,276 @@ class CommandRunnerHandler(BaseHTTPRequestHandler):
             status=201,
         )
 
+    def _handle_upload_stream(self) -> None:
+        """Cache a multipart/form-data upload: a `folder` field, then `files` parts named by relative path."""
+        if StreamingFormDataParser is None and cgi is None:
+            self._write_json({"error": "multipart uploads need the streaming-form-data package"}, status=501)
+            return
+        if not self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            self._write_json({"error": "expected multipart/form-data"}, status=400)
+            return
+
+        server_root: Path = getattr(self.server, "root", _REPO_ROOT)  # type: ignore[attr-defined]
+        cache_root: Path = getattr(self.server, "cache_root", server_root / CACHE_DIRNAME)  # type: ignore[attr-defined]
+        cache_root.mkdir(parents=True, exist_ok=True)
+
+        # The folder name may only arrive with the body, so files land in a
+        # staging directory that is renamed once the whole body is parsed.
+        suffix = os.urandom(4).hex()
+        staging = cache_root / f".upload-{suffix}"
+        try:
+            staging.mkdir()
+        except FileExistsError:
+            self._write_json({"error": "unable to create cache directory"}, status=500)
+            return
+
+        try:
+            if StreamingFormDataParser is not None:
+                folder, written = self._receive_multipart_streaming(staging)
+            else:
+                folder, written = self._receive_multipart_cgi(staging)
+            if not folder.strip():
+                raise ValueError("folder must be a non-empty string")
+        except Exception as exc:
+            _safe_rmtree(staging)
+            self._write_json({"error": str(exc)}, status=400)
+            return
+
+        if written == 0:
+            _safe_rmtree(staging)
+            self._write_json({"error": "no files were cached"}, status=400)
+            return
+
+        target = cache_root / f"{_slugify(folder)}-{suffix}"
+        staging.rename(target)
+        self._write_json(
+            {
+                "status": "ok",
+                "cache_dir": str(target.relative_to(server_root)),
+                "display_name": folder,
+                "file_count": written,
+            },
+            status=201,
+        )
+
+    def _receive_multipart_streaming(self, staging: Path) -> tuple[str, int]:
+        length = self._content_length()
+        parser = StreamingFormDataParser(headers=self.headers)
+        folder_target = ValueTarget()
+        files_target = _UploadTreeTarget(staging)
+        parser.register("folder", folder_target)
+        parser.register("files", files_target)
+        try:
+            remaining = length
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK))
+                if not chunk:
+                    break
+                parser.data_received(chunk)
+                remaining -= len(chunk)
+            if remaining:
+                raise ValueError("request body ended early")
+        finally:
+            files_target.close()
+        return folder_target.value.decode("utf-8", "replace"), files_target.count
+
+    def _receive_multipart_cgi(self, staging: Path) -> tuple[str, int]:
+        env = {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(self._content_length()),
+        }
+        form = cgi.FieldStorage(fp=self.rfile, headers=self.headers, environ=env)
+        folder = form.getvalue("folder", "")
+        parts = form["files"] if "files" in form else []
+        if not isinstance(parts, list):
+            parts = [parts]
+        written = 0
+        made = {staging}
+        for part in parts:
+            if not getattr(part, "file", None):
+                continue
+            dest = staging / _ensure_relative_path(part.filename or "")
+            _ensure_parent(dest, made)
+            with open(dest, "wb") as f:
+                shutil.copyfileobj(part.file, f, UPLOAD_CHUNK)
+            written += 1
+        return folder if isinstance(folder, str) else "", written
+
     # Helpers -----------------------------------------------------------------
+    def _content_length(self) -> int:
+        """Request Content-Length; 0 when absent or malformed."""
+        value = self.headers.get("Content-Length")
+        if value:
+            value = value.strip()
+            if value.isascii() and value.isdigit():
+                return int(value)
+        return 0
+
     def _write_cors_headers(self) -> None:
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
 
-    def _write_bytes(self, data: bytes, content_type: str, status: int = 200) -> None:
+    def _write_bytes(
+        self, data: bytes, content_type: str, status: int = 200, content_encoding: str | None = None
+    ) -> None:
         self.send_response(status)
         self._write_cors_headers()
         self.send_header("Content-Type", content_type)
+        if content_encoding is not None:
+            self.send_header("Content-Encoding", content_encoding)
+            self.send_header("Vary", "Accept-Encoding")
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
 
     def _write_file(self, path: Path) -> None:
-        data = path.read_bytes()
-        content_type, _ = mimetypes.guess_type(str(path))
-        if not content_type:
-            content_type = "application/octet-stream"
-        if content_type.startswith("text/") and "charset=" not in content_type:
-            content_type = f"{content_type}; charset=utf-8"
-        self._write_bytes(data, content_type)
+        if _accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            self._write_bytes(_read_cached(path, gzipped=True), _content_type(str(path)), content_encoding="gzip")
+        else:
+            self._write_bytes(_read_cached(path), _content_type(str(path)))
 
     def _write_json(self, data: dict[str, Any], status: int = 200) -> None:
-        body = json.dumps(data).encode("utf-8")
+        body = _dumps(data)
         self._write_bytes(body, "application/json; charset=utf-8", status=status)
 
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        if getattr(self.server, "quiet", False):  # --quiet: drop access lines, keep errors
+            return
+        super().log_request(code, size)
+
     def log_message(self, fmt: str, *args: Any) -> None:  # type: ignore[override]
-        sys.stderr.write("%s - - [%s] %s\n" % (self.client_address[0], self.log_date_time_string(), fmt % args))
+        _log.info("%s - - [%s] %s", self.client_address[0], self.log_date_time_string(), fmt % args)
+
 
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles connections on a fixed-size thread pool instead of a thread each."""
 
-def serve(host: str, port: int, root: Path) -> None:
-    server = ThreadingHTTPServer((host, port), CommandRunnerHandler)
+    def __init__(self, server_address, handler_class, max_workers: int, reuse_port: bool = False) -> None:
+        # SO_REUSEPORT lets several --workers processes bind the same port; the kernel spreads connections
+        self.allow_reuse_port = reuse_port
+        # Created first: TCPServer.__init__ calls server_close() if bind fails
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._process_request_pooled, request, client_address)
+
+    def _process_request_pooled(self, request, client_address) -> None:
+        # Same contract as ThreadingMixIn.process_request_thread
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(
+    host: str,
+    port: int,
+    root: Path,
+    threads_http: int = DEFAULT_HTTP_THREADS,
+    max_output_bytes: int = MAX_OUTPUT_BYTES,
+    quiet: bool = False,
+    workers: int = 1,
+) -> None:
+    # Fork before any thread exists; every process then binds its own SO_REUSEPORT socket.
+    children: list[int] = []
+    is_parent = True
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            is_parent = False
+            children = []
+            break
+        children.append(pid)
+    if children:
+        # Let `kill <parent>` run the cleanup below instead of orphaning the workers
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    server = PooledHTTPServer((host, port), CommandRunnerHandler, max_workers=threads_http, reuse_port=workers > 1)
     cache_root = (root / CACHE_DIRNAME).resolve()
     cache_root.mkdir(parents=True, exist_ok=True)
     server.root = root  # type: ignore[attr-defined]
     server.cache_root = cache_root  # type: ignore[attr-defined]
     server.dashboard = DASHBOARD_HTML  # type: ignore[attr-defined]
-    print(f"Serving dashboard runner on http://{host}:{port} (cwd={root})")
+    server.max_output_bytes = max_output_bytes  # type: ignore[attr-defined]
+    server.quiet = quiet  # type: ignore[attr-defined]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stderr))
+    _log.addHandler(queue_handler)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+    listener.start()
+    if is_parent:
+        print(f"Serving dashboard runner on http://{host}:{port} (cwd={root}, workers={workers})")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
-        print("\nShutting down...", file=sys.stderr)
+        if is_parent:
+            print("\nShutting down...", file=sys.stderr)
     finally:
         server.server_close()
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+        listener.stop()
+        _log.removeHandler(queue_handler)
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run commands for the dashboard via HTTP")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to bind (default: {DEFAULT_PORT})")
-    parser.add_argument("--root", type=Path, default=_repo_root(), help="Working directory for executed commands")
+    parser.add_argument("--root", type=Path, default=_REPO_ROOT, help="Working directory for executed commands")
+    parser.add_argument(
+        "--threads-http",
+        type=int,
+        default=DEFAULT_HTTP_THREADS,
+        help=f"Maximum concurrently handled requests (default: {DEFAULT_HTTP_THREADS})",
+    )
+    parser.add_argument(
+        "--max-output-bytes",
+        type=int,
+        default=MAX_OUTPUT_BYTES,
+        help="Keep at most this many trailing bytes of each /run stdout/stderr (default: 16 MiB)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Server processes sharing the port via SO_REUSEPORT (default: 1; POSIX only)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Do not log one line per request (errors are still logged)")
     return parser.parse_args(argv)
 
 
 def main(argv: list[str]) -> int:
     args = parse_args(argv)
-    serve(args.host, args.port, args.root.resolve())
+    if args.threads_http < 1:
+        print("--threads-http must be at least 1", file=sys.stderr)
+        return 2
+    if args.max_output_bytes < 1:
+        print("--max-output-bytes must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers < 1:
+        print("--workers must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        print("--workers > 1 needs fork() and SO_REUSEPORT, which this platform lacks", file=sys.stderr)
+        return 2
+    serve(args.host, args.port, args.root.resolve(), args.threads_http, args.max_output_bytes, args.quiet, args.workers)
     return 0
 
 
@@ -1,17 +1,35 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import os
 import sys
 import time
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Sequence, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import itertools
 import re
+import threading
 
 from urllib import request as urlrequest
 from urllib import error as urlerror
 
+try:
+    import urllib3  # optional: pooled keep-alive connections to OpenRouter
+except ImportError:
+    urllib3 = None  # type: ignore
+
+try:
+    import orjson  # optional: faster JSON for request/response bodies
+except ImportError:
+    orjson = None  # type: ignore
+
+# Connection-level failures worth retrying (as opposed to HTTP error statuses)
+_TRANSPORT_ERRORS: Tuple[type, ...] = (urlerror.URLError,)
+if urllib3 is not None:
+    _TRANSPORT_ERRORS += (urllib3.exceptions.HTTPError,)
+
 
 DEFAULT_SYSTEM_PROMPT = (
 r"""
@@ -101,6 +119,21 @@ def conj_in_aut {G : Type*} [Group G] (a : G) : ∃ f : G ≃* G, f.toFun = (Mul
 
 VALID_MESSAGE_ROLES = {"system", "user", "assistant"}
 
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(raw: Any) -> Any:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch one type
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", errors="ignore")
+    return json.loads(raw)
+
 def _load_api_key_from_keyfile() -> Optional[str]:
     candidates = [Path.cwd() / ".openrouter_key", Path(__file__).parent / ".openrouter_key"]
     for p in candidates:
@@ -134,7 +167,14 @@ def strip_code_fences(text: str) -> str:
 
 
 def ensure_top_import_mathlib(text: str) -> str:
+    # Common cases first, without the per-line loop: no import at all, or
+    # already exactly one on the first line (count also sees `import Mathlib.X`).
+    n_imports = text.count("import Mathlib")
+    if n_imports == 0:
+        return ("import Mathlib\n" + "\n".join(text.splitlines())).strip() + "\n"
     lines = text.splitlines()
+    if n_imports == 1 and lines[0].strip() == "import Mathlib":
+        return "\n".join(lines).strip() + "\n"
     # Remove duplicate `import Mathlib` lines after the top
     seen_import_mathlib = False
     cleaned: List[str] = []
@@ -162,7 +202,7 @@ def load_fewshot_messages(path: Optional[Path]) -> List[Dict[str, str]]:
         raise OSError(f"Unable to read few-shot JSON {path}: {exc}") from exc
 
     try:
-        data = json.loads(raw) if raw.strip() else []
+        data = _loads(raw) if raw.strip() else []
     except json.JSONDecodeError as exc:
         raise ValueError(f"Invalid JSON in {path}: {exc}") from exc
 
@@ -188,63 +228,50 @@ def load_fewshot_messages(path: Optional[Path]) -> List[Dict[str, str]]:
     return normalized
 
 
+# Anchors for build_fallback_skeleton, matched against the "\n"-joined splitlines()
+# of the source so `^`/`$` agree with its line boundaries; `[^\S\n]` is in-line
+# whitespace, the same set str.strip() removes.
+_HEADER_LINE_RE = re.compile(r"[^\S\n]*(import|open) (?=[^\n]*\S)[^\n]*")
+_DOC_OPEN_RE = re.compile(r"^[^\S\n]*/--", re.MULTILINE)
+_DOC_CLOSE_RE = re.compile(r"^[^\S\n]*-/[^\n]*", re.MULTILINE)
+_DECL_RE = re.compile(r"^[^\S\n]*(?:theorem|lemma) ", re.MULTILINE)
+
+
+# Line breaks str.splitlines() honours besides "\n"
+_OTHER_LINE_BREAKS = ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
+
 def build_fallback_skeleton(src: str) -> Optional[str]:
-    lines = src.splitlines()
+    if any(sep in src for sep in _OTHER_LINE_BREAKS):
+        text = "\n".join(src.splitlines())
+    else:
+        # Same text without building the line list: splitlines() only drops a final "\n"
+        text = src[:-1] if src.endswith("\n") else src
     imports: List[str] = []
     opens: List[str] = []
     docstring: Optional[str] = None
 
-    i = 0
-    n = len(lines)
-    while i < n:
-        s = lines[i].strip()
-        if s.startswith("import "):
-            imports.append(lines[i])
-            i += 1
-            continue
-        if s.startswith("open "):
-            opens.append(lines[i])
-            i += 1
-            continue
-        break
-
-    # Find first docstring
-    i = 0
-    while i < n:
-        if lines[i].lstrip().startswith("/--"):
-            ds = [lines[i]]
-            i += 1
-            while i < n and not lines[i].lstrip().startswith("-/"):
-                ds.append(lines[i])
-                i += 1
-            if i < n:
-                ds.append(lines[i])
-            docstring = "\n".join(ds)
-            break
-        i += 1
+    # Leading run of import/open lines
+    pos = 0
+    while (m := _HEADER_LINE_RE.match(text, pos)) is not None:
+        (imports if m.group(1) == "import" else opens).append(m.group())
+        pos = m.end() + 1
+
+    # Find first docstring; it ends at the next line starting with "-/" (or at EOF)
+    m = _DOC_OPEN_RE.search(text)
+    if m is not None:
+        nl = text.find("\n", m.start())
+        close = _DOC_CLOSE_RE.search(text, nl + 1) if nl != -1 else None
+        docstring = text[m.start() : close.end() if close is not None else len(text)]
 
     # Find first theorem/lemma and capture its signature up to ":="
-    start = -1
-    for idx, ln in enumerate(lines):
-        s = ln.lstrip()
-        if s.startswith("theorem ") or s.startswith("lemma "):
-            start = idx
-            break
-    if start == -1:
+    m = _DECL_RE.search(text)
+    if m is None:
         return None
-    sig_buf: List[str] = []
-    j = start
-    found_assign = False
-    while j < n:
-        sig_buf.append(lines[j])
-        if ":=" in lines[j]:
-            found_assign = True
-            break
-        j += 1
-    if not found_assign:
+    assign = text.find(":=", m.start())
+    if assign == -1:
         return None
-    sig_text = "\n".join(sig_buf)
-    sig_left = sig_text.split(":=", 1)[0].rstrip()
+    sig_left = text[m.start() : assign].rstrip()
 
     # Ensure final assembly
     out: List[str] = []
@@ -262,13 +289,82 @@ def build_fallback_skeleton(src: str) -> Optional[str]:
     return final
 
 
+def _retry_after_seconds(headers: Any) -> float:
+    """Seconds to wait from Retry-After / X-RateLimit-Reset response headers (0.0 if absent)."""
+    try:
+        # Honor standard and OpenRouter-specific headers
+        ra = headers.get("Retry-After") if headers is not None else None
+        if ra:
+            return float(ra)
+        xrr = headers.get("X-RateLimit-Reset") if headers is not None else None
+        if xrr:
+            # Could be epoch or seconds; best-effort parse
+            val = float(xrr)
+            # If it's a timestamp in the future, convert to delta
+            now = time.time()
+            return max(0.0, val - now) if val > 1e6 else val
+    except Exception:
+        pass
+    return 0.0
+
+
 class OpenRouterClient:
-    def __init__(self, api_key: str, *, base_url: str = "https://openrouter.ai/api/v1", timeout: float = 60.0):
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        base_url: str = "https://openrouter.ai/api/v1",
+        timeout: float = 60.0,
+        pool_size: int = 10,
+    ):
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        # One keep-alive pool shared by all worker threads, so requests reuse
+        # TCP+TLS connections instead of handshaking per call. Without urllib3
+        # every call opens a fresh connection through urllib.
+        self._http = None
+        if urllib3 is not None:
+            self._http = urllib3.PoolManager(
+                num_pools=1,
+                maxsize=max(pool_size, 10),
+                block=False,
+                retries=False,
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            )
+
+    def _post(self, url: str, data: bytes, headers: Dict[str, str]) -> Tuple[int, Any, bytes]:
+        """POST `data`; return (status, response headers, body) for any HTTP status.
 
-    def chat_completion(self, messages: List[Dict[str, Any]], model: str, **kwargs) -> Dict[str, Any]:
+        Transport failures raise one of `_TRANSPORT_ERRORS`.
+        """
+        if self._http is not None:
+            resp = self._http.request("POST", url, body=data, headers=headers)
+            return resp.status, resp.headers, resp.data
+        req = urlrequest.Request(url, data=data, headers=headers, method="POST")
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.headers, resp.read()
+        except urlerror.HTTPError as e:
+            try:
+                body = e.read()
+            except Exception:
+                body = b""
+            return e.code, e.headers, body
+
+    def chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        *,
+        prefix: Optional[bytes] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """POST a chat completion and return the decoded response.
+
+        `prefix` is an already-serialized leading part of the message list (see
+        `encode_messages_prefix`); `messages` are then only the turns after it.
+        """
         url = f"{self.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -288,59 +384,44 @@ class OpenRouterClient:
         if isinstance(mt, int) and mt > 0:
             payload["max_tokens"] = mt
 
-        data = json.dumps(payload).encode("utf-8")
+        if prefix is None:
+            data = _dumps(payload)
+        else:
+            # Splice the pre-serialized prefix in instead of re-encoding it per call:
+            # {"model":...,"messages":<prefix>,<messages>],<rest of payload>}
+            del payload["messages"]
+            tail = _dumps(messages)[1:] if messages else b"]"
+            sep = b"," if messages and len(prefix) > 1 else b""
+            data = b"".join(
+                (_dumps({"model": payload.pop("model")})[:-1], b',"messages":', prefix, sep, tail, b",", _dumps(payload)[1:])
+            )
 
         attempts = 5
         delay = 1.0
         last_err: Optional[Exception] = None
         for _ in range(attempts):
-            req = urlrequest.Request(url, data=data, headers=headers, method="POST")
             try:
-                with urlrequest.urlopen(req, timeout=self.timeout) as resp:
-                    raw = resp.read().decode("utf-8", errors="ignore")
-                    return json.loads(raw)
-            except urlerror.HTTPError as e:
-                # Retry on 429 (rate limit) and 5xx
-                if e.code == 429 or (500 <= e.code < 600):
-                    last_err = e
-                    retry_after = 0.0
-                    try:
-                        # Honor standard and OpenRouter-specific headers
-                        ra = e.headers.get("Retry-After") if hasattr(e, "headers") else None
-                        if ra:
-                            retry_after = float(ra)
-                        else:
-                            xrr = e.headers.get("X-RateLimit-Reset") if hasattr(e, "headers") else None
-                            if xrr:
-                                # Could be epoch or seconds; best-effort parse
-                                try:
-                                    val = float(xrr)
-                                    # If it's a timestamp in the future, convert to delta
-                                    now = time.time()
-                                    retry_after = max(0.0, val - now) if val > 1e6 else val
-                                except Exception:
-                                    retry_after = 0.0
-                    except Exception:
-                        retry_after = 0.0
-                    sleep_for = max(retry_after, delay)
-                    try:
-                        print(f"WARN: HTTP {e.code} from OpenRouter; retrying in {sleep_for:.1f}s", file=sys.stderr)
-                    except Exception:
-                        pass
-                    time.sleep(sleep_for)
-                    delay = min(delay * 2, 20.0)
-                    continue
-                # Try to include a short snippet of body for context
-                try:
-                    body = e.read().decode("utf-8", errors="ignore")
-                except Exception:
-                    body = ""
-                raise RuntimeError(f"HTTP error {e.code}: {body[:200]}") from e
-            except urlerror.URLError as e:
+                status, resp_headers, body = self._post(url, data, headers)
+            except _TRANSPORT_ERRORS as e:
                 last_err = e
                 time.sleep(delay)
                 delay = min(delay * 2, 20.0)
                 continue
+            if status < 400:
+                return _loads(body)
+            # Retry on 429 (rate limit) and 5xx
+            if status == 429 or (500 <= status < 600):
+                last_err = RuntimeError(f"HTTP error {status}")
+                sleep_for = max(_retry_after_seconds(resp_headers), delay)
+                try:
+                    print(f"WARN: HTTP {status} from OpenRouter; retrying in {sleep_for:.1f}s", file=sys.stderr)
+                except Exception:
+                    pass
+                time.sleep(sleep_for)
+                delay = min(delay * 2, 20.0)
+                continue
+            # Include a short snippet of body for context
+            raise RuntimeError(f"HTTP error {status}: {body.decode('utf-8', errors='ignore')[:200]}")
         if last_err:
             raise last_err
         raise RuntimeError("Unknown error contacting OpenRouter")
@@ -428,13 +509,13 @@ theorem contrapositive_of_coset_implication {G : Type*} [Group G] (H : Subgroup
 ).strip()
 
 
-def build_messages(
+def build_static_messages(
     system_prompt: str,
-    file_content: str,
     *,
     include_fewshot: bool = False,
     extra_turns: Optional[Sequence[Dict[str, str]]] = None,
 ) -> List[Dict[str, str]]:
+    """The leading messages shared by every file: system prompt, extra turns, few-shot example."""
     msgs: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
     if extra_turns:
         for entry in extra_turns:
@@ -456,48 +537,114 @@ def build_messages(
             }
         )
         msgs.append({"role": "assistant", "content": FEWSHOT_ASSISTANT_EXAMPLE})
-    msgs.append(
-        {
-            "role": "user",
-            "content": (
-                "Here is a Lean file. Transform it per the rules and return only the final Lean source.\n\n"
-                + file_content
-            ),
-        }
-    )
     return msgs
 
 
+def build_user_message(file_content: str) -> Dict[str, str]:
+    return {
+        "role": "user",
+        "content": (
+            "Here is a Lean file. Transform it per the rules and return only the final Lean source.\n\n"
+            + file_content
+        ),
+    }
+
+
+def build_messages(
+    system_prompt: str,
+    file_content: str,
+    *,
+    include_fewshot: bool = False,
+    extra_turns: Optional[Sequence[Dict[str, str]]] = None,
+) -> List[Dict[str, str]]:
+    msgs = build_static_messages(system_prompt, include_fewshot=include_fewshot, extra_turns=extra_turns)
+    msgs.append(build_user_message(file_content))
+    return msgs
+
+
+# Models whose OpenRouter providers only cache prompts at explicit `cache_control`
+# breakpoints; OpenAI/DeepSeek/Grok-style providers cache identical prefixes automatically.
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def mark_cache_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tag the last message as a prompt-cache breakpoint so providers can reuse the static prefix."""
+    if not messages or not messages[-1].get("content"):
+        return messages
+    last = messages[-1]
+    block = {"type": "text", "text": last["content"], "cache_control": {"type": "ephemeral"}}
+    return messages[:-1] + [{"role": last["role"], "content": [block]}]
+
+
+def encode_messages_prefix(messages: Sequence[Dict[str, Any]]) -> bytes:
+    """Serialize `messages` once as an open JSON array, for `chat_completion(prefix=...)`."""
+    return _dumps(list(messages))[:-1]
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "completions"
+
+
+class ResponseCache:
+    """On-disk completions keyed by blake2b(model, max_tokens, static prompt prefix, file content)."""
+
+    def __init__(self, root: Path, model: str, messages_prefix: bytes, max_tokens: Optional[int]):
+        self.root = root
+        # Hash the run-wide inputs once; each lookup copies this state and adds only the file
+        self._base = hashlib.blake2b(digest_size=20)
+        for part in (model.encode("utf-8"), str(max_tokens).encode("ascii"), messages_prefix):
+            self._base.update(len(part).to_bytes(8, "little"))
+            self._base.update(part)
+
+    def _path(self, src: str) -> Path:
+        h = self._base.copy()
+        h.update(src.encode("utf-8"))
+        key = h.hexdigest()
+        return self.root / key[:2] / key
+
+    def get(self, src: str) -> Optional[str]:
+        try:
+            return self._path(src).read_bytes().decode("utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def put(self, src: str, content: str) -> None:
+        path = self._path(src)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(content.encode("utf-8"))  # bytes: keep "\r\n" exactly as returned
+            os.replace(tmp, path)  # readers never see a half-written entry
+        except OSError as exc:
+            tmp.unlink(missing_ok=True)
+            print(f"WARN: could not cache completion for reuse: {exc}", file=sys.stderr)
+
+
 def process_file(
     client: OpenRouterClient,
     in_path: Path,
     out_path: Path,
     model: str,
-    system_prompt: str,
+    messages_prefix: bytes,
     overwrite: bool,
     normalize: bool,
     max_tokens: Optional[int],
     retries: int,
-    include_fewshot: bool,
-    fewshot_turns: Optional[Sequence[Dict[str, str]]],
+    cache: Optional[ResponseCache] = None,
 ) -> Optional[Path]:
+    """Transform one file; `messages_prefix` is the `encode_messages_prefix` of the static messages."""
     if out_path.exists() and not overwrite:
         return None
 
     src = in_path.read_text(encoding="utf-8", errors="ignore")
-    messages = build_messages(
-        system_prompt,
-        src,
-        include_fewshot=include_fewshot,
-        extra_turns=fewshot_turns,
-    )
+    messages = [build_user_message(src)]
 
-    content = ""
+    content = (cache.get(src) or "") if cache is not None else ""
+    cached = bool(content)
     attempt = 0
     last_error: Optional[Exception] = None
-    while attempt <= retries:
+    while not content and attempt <= retries:
         try:
-            data = client.chat_completion(messages, model=model, max_tokens=max_tokens)
+            data = client.chat_completion(messages, model=model, prefix=messages_prefix, max_tokens=max_tokens)
         except Exception as exc:
             last_error = exc
             attempt += 1
@@ -526,6 +673,8 @@ def process_file(
             pass
         return out_path
 
+    if cache is not None and not cached:
+        cache.put(src, content)
     content = strip_code_fences(content)
     if normalize:
         content = ensure_top_import_mathlib(content)
@@ -535,8 +684,37 @@ def process_file(
     return out_path
 
 
+def _scan_lean_files(root: str, recursive: bool) -> Iterator[Path]:
+    try:
+        it = os.scandir(root)
+    except OSError:  # missing/unreadable dir: skipped, like glob does
+        return
+    with it:
+        subdirs: List[str] = []
+        for entry in it:
+            try:
+                if entry.is_file():
+                    if entry.name.endswith(".lean"):
+                        yield Path(entry.path)
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+    for sub in subdirs:
+        yield from _scan_lean_files(sub, recursive)
+
+
+def iter_lean_files(input_dir: Path, pattern: str) -> Iterator[Path]:
+    """Yield files matching `pattern` under `input_dir` as they are found (filesystem order)."""
+    # The default patterns walk the tree with os.scandir, reusing the d_type that
+    # readdir already returned instead of pathlib's per-path stat calls.
+    if pattern in ("**/*.lean", "*.lean"):
+        return _scan_lean_files(str(input_dir), recursive=pattern.startswith("**/"))
+    return input_dir.glob(pattern)
+
+
 def find_lean_files(input_dir: Path, pattern: str) -> List[Path]:
-    return sorted(input_dir.glob(pattern))
+    return sorted(iter_lean_files(input_dir, pattern))
 
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
@@ -552,6 +730,11 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     p.add_argument("--overwrite", action="store_true", help="Overwrite existing outputs")
     p.add_argument("--normalize", action="store_true", help="Normalize: ensure single top `import Mathlib`")
     p.add_argument("--limit", type=int, default=0, help="Process at most N files (0 = no limit)")
+    p.add_argument(
+        "--no-sort",
+        action="store_true",
+        help="Start on files as the directory walk finds them instead of listing and sorting them all first",
+    )
     p.add_argument("--append-system", type=str, default="", help="Append text to system prompt for customization")
     p.add_argument("--api-key", type=str, default="", help="OpenRouter API key; overrides env and .openrouter_key if provided")
     p.add_argument("--continue-on-error", action="store_true", help="Continue processing remaining files when an error occurs")
@@ -564,18 +747,39 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         default=None,
         help="Path to JSON file with additional conversation turns to prepend",
     )
+    p.add_argument(
+        "--no-prompt-cache",
+        dest="prompt_cache",
+        action="store_false",
+        help="Do not mark the system/few-shot prefix with cache_control for Anthropic/Gemini models",
+    )
+    p.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Reuse completions from earlier runs with identical model, prompts and file content (default: on)",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for cached completions (default: LLM_Agent/.cache/completions)",
+    )
     # Leave empty to default to <output-dir>/failed_ids.json and <output-dir>/errors.log
     p.add_argument("--fail-out", type=str, default="", help="Path to write JSON array of failed block ids (default: <output-dir>/failed_ids.json)")
     p.add_argument("--error-log", type=str, default="", help="Path to write detailed error messages (default: <output-dir>/errors.log)")
     return p.parse_args(argv)
 
 
+_BLOCK_ID_RE = re.compile(r"\d+")
+
+
 def _extract_block_id(path: Path) -> Optional[int]:
-    m = re.search(r"(\d+)", path.stem)
+    m = _BLOCK_ID_RE.search(path.stem)
     if not m:
         return None
     try:
-        return int(m.group(1))
+        return int(m.group())
     except Exception:
         return None
 
@@ -621,15 +825,28 @@ def main(argv: List[str]) -> int:
     fail_out_path = Path(args.fail_out) if args.fail_out else (out_base / "failed_ids.json")
     error_log_path = Path(args.error_log) if args.error_log else (out_base / "errors.log")
 
-    client = OpenRouterClient(api_key)
-    files = find_lean_files(args.input_dir, args.match)
-    if not files:
+    # System prompt + few-shot turns are identical for every file: serialize them once
+    static_messages: List[Dict[str, Any]] = build_static_messages(
+        system_prompt, include_fewshot=use_builtin_fewshot, extra_turns=fewshot_turns
+    )
+    if args.prompt_cache and args.model.startswith(CACHE_CONTROL_MODEL_PREFIXES):
+        static_messages = mark_cache_breakpoint(static_messages)
+    messages_prefix = encode_messages_prefix(static_messages)
+
+    client = OpenRouterClient(api_key, pool_size=args.workers)
+    if args.no_sort:
+        files: Iterator[Path] = iter_lean_files(args.input_dir, args.match)
+    else:
+        files = iter(find_lean_files(args.input_dir, args.match))
+    first = next(files, None)
+    if first is None:
         print(f"No files matched in {args.input_dir} with pattern {args.match}")
         return 0
+    files = itertools.chain((first,), files)
 
     # Limit number of files
     if args.limit:
-        files = files[: args.limit]
+        files = itertools.islice(files, args.limit)
 
     total = 0
     failed = 0
@@ -639,6 +856,7 @@ def main(argv: List[str]) -> int:
         effective_max_tokens = None
     else:
         effective_max_tokens = args.max_tokens if (isinstance(args.max_tokens, int) and args.max_tokens > 0) else None
+    cache = ResponseCache(args.cache_dir, args.model, messages_prefix, effective_max_tokens) if args.cache else None
 
     def worker(path: Path) -> Tuple[Path, bool, Optional[str]]:
         rel = path.relative_to(args.input_dir)
@@ -651,13 +869,12 @@ def main(argv: List[str]) -> int:
                 in_path=path,
                 out_path=out_path,
                 model=args.model,
-                system_prompt=system_prompt,
+                messages_prefix=messages_prefix,
                 overwrite=args.overwrite,
                 normalize=args.normalize,
                 max_tokens=effective_max_tokens,
                 retries=args.retries,
-                include_fewshot=use_builtin_fewshot,
-                fewshot_turns=fewshot_turns,
+                cache=cache,
             )
             if res is not None:
                 return (res, True, None)
@@ -668,28 +885,38 @@ def main(argv: List[str]) -> int:
 
     if args.workers and args.workers > 1:
         with ThreadPoolExecutor(max_workers=args.workers) as ex, open(error_log_path, "w", encoding="utf-8") as elog:
-            futs = {ex.submit(worker, p): p for p in files}
-            for fut in as_completed(futs):
-                path = futs[fut]
-                try:
-                    res_path, ok, err = fut.result()
-                except Exception as e:
-                    ok = False
-                    err = str(e)
-                    res_path = path
-                if ok:
-                    print(f"Wrote: {res_path}")
-                    total += 1
-                else:
-                    bid = _extract_block_id(path)
-                    if bid is not None:
-                        failed_ids.append(bid)
-                    failed += 1
-                    msg = f"Error processing {path}: {err}\n"
-                    print(msg, file=sys.stderr)
-                    elog.write(msg)
-                    if not args.continue_on_error:
-                        break
+            # Keep a bounded window of submitted files and top it up as they finish,
+            # so work starts while `files` is still being produced.
+            window = args.workers * 2
+            futs = {ex.submit(worker, p): p for p in itertools.islice(files, window)}
+            stop = False
+            while futs:
+                done, _ = wait(futs, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    path = futs.pop(fut)
+                    try:
+                        res_path, ok, err = fut.result()
+                    except Exception as e:
+                        ok = False
+                        err = str(e)
+                        res_path = path
+                    if ok:
+                        print(f"Wrote: {res_path}")
+                        total += 1
+                    else:
+                        bid = _extract_block_id(path)
+                        if bid is not None:
+                            failed_ids.append(bid)
+                        failed += 1
+                        msg = f"Error processing {path}: {err}\n"
+                        print(msg, file=sys.stderr)
+                        elog.write(msg)
+                        if not args.continue_on_error:
+                            # Submit nothing new; files already in flight still finish
+                            stop = True
+                if not stop:
+                    for p in itertools.islice(files, len(done)):
+                        futs[ex.submit(worker, p)] = p
     else:
         with open(error_log_path, "w", encoding="utf-8") as elog:
             for path in files:
@@ -701,13 +928,12 @@ def main(argv: List[str]) -> int:
                         in_path=path,
                         out_path=out_path,
                         model=args.model,
-                        system_prompt=system_prompt,
+                        messages_prefix=messages_prefix,
                         overwrite=args.overwrite,
                         normalize=args.normalize,
                         max_tokens=effective_max_tokens,
                         retries=args.retries,
-                        include_fewshot=use_builtin_fewshot,
-                        fewshot_turns=fewshot_turns,
+                        cache=cache,
                     )
                     if res is not None:
                         print(f"Wrote: {res}")
@@ -730,7 +956,7 @@ def main(argv: List[str]) -> int:
 
     # Write failed ids list
     try:
-        fail_out_path.write_text(json.dumps(sorted(failed_ids)), encoding="utf-8")
+        fail_out_path.write_bytes(_dumps(sorted(failed_ids)))
     except Exception:
         pass
 
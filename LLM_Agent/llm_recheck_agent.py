@@ -202,7 +202,7 @@ def main(argv: List[str]) -> int:
     if not api_key:
         print("ERROR: Provide OpenRouter API key: --api-key, or set OPENROUTER_API_KEY env, or place it in .openrouter_key", file=sys.stderr)
         return 2
-    client = base.OpenRouterClient(api_key)
+    client = base.OpenRouterClient(api_key, pool_size=args.workers)
 
     system_prompt = RECHECK_SYSTEM_PROMPT
     if args.append_system:
@@ -8,9 +8,15 @@ import subprocess
 import json
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 import threading
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster JSON encoding for build summaries
+except ImportError:
+    orjson = None  # type: ignore
+
 # Thread-safe logging
 log_lock = threading.Lock()
 
@@ -86,14 +92,17 @@ def build_lean_file(file_path, output_dir, log_suffix="build"):
         
         # Save individual logs (use suffix to distinguish retry)
         log_file = output_dir / f"{block_id}_{log_suffix}.log"
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.write(f"Command: {' '.join(cmd)}\n")
-            f.write(f"Return Code: {result.returncode}\n")
-            f.write(f"Success: {success}\n")
-            f.write("\n--- STDOUT ---\n")
-            f.write(result.stdout)
-            f.write("\n--- STDERR ---\n")
-            f.write(result.stderr)
+        # One write per log instead of seven through the text layer
+        log_file.write_text(
+            f"Command: {' '.join(cmd)}\n"
+            f"Return Code: {result.returncode}\n"
+            f"Success: {success}\n"
+            "\n--- STDOUT ---\n"
+            f"{result.stdout}"
+            "\n--- STDERR ---\n"
+            f"{result.stderr}",
+            encoding='utf-8',
+        )
         
         status = "✓" if success else "✗"
         log_message(f"{status} {block_id} ({'OK' if success else 'FAILED'})")
@@ -107,7 +116,13 @@ def build_lean_file(file_path, output_dir, log_suffix="build"):
         log_message(f"✗ {block_id} (ERROR: {str(e)})")
         return block_id, False, "", f"Build error: {str(e)}", ""
 
-def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_workers=4, progress_cb=None, pattern: str = "*.lean"):
+def _borrow_pool(executor, max_workers):
+    """Use the caller's executor as-is (not shut down), or open a fresh one."""
+    if executor is not None:
+        return nullcontext(executor)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_workers=4, progress_cb=None, pattern: str = "*.lean", executor=None):
     """
     Run parallel build check on Lean files
     
@@ -116,6 +131,10 @@ def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_worke
         output_dir: Path to directory for logs and results
         block_range: Tuple (start, end) for block numbers to check, or None for all
         max_workers: Number of parallel workers
+        executor: Optional ThreadPoolExecutor to run builds on, so callers
+            checking several directories can share one pool
+
+    The returned summary lists "successful_blocks" and "failed_blocks" sorted.
     """
     blocks_path = Path(blocks_dir)
     output_path = Path(output_dir)
@@ -155,12 +174,12 @@ def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_worke
     id_to_file = {}
     
     # Run parallel builds
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with _borrow_pool(executor, max_workers) as pool:
         # Submit all tasks
         future_to_file = {}
         for file_path in lean_files:
             id_to_file[file_path.stem] = file_path
-            future = executor.submit(build_lean_file, file_path, output_path, "build")
+            future = pool.submit(build_lean_file, file_path, output_path, "build")
             future_to_file[future] = file_path
         
         # Collect results as they complete
@@ -202,9 +221,9 @@ def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_worke
         log_message("Retrying failed builds once...")
         retry_files = [id_to_file[b] for b in failed_builds if b in id_to_file]
         retry_results = {}
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with _borrow_pool(executor, max_workers) as pool:
             future_to_block = {
-                executor.submit(build_lean_file, f, output_path, "rebuild"): f.stem
+                pool.submit(build_lean_file, f, output_path, "rebuild"): f.stem
                 for f in retry_files
             }
             for future in as_completed(future_to_block):
@@ -238,6 +257,11 @@ def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_worke
                 final_failed.append(b)
         successful_builds = sorted(final_success)
         failed_builds = final_failed
+
+    # Results arrive in completion order; report ids sorted so callers
+    # can use the lists as-is.
+    successful_builds.sort()
+    failed_builds.sort()
     
     # Generate summary report
     summary = {
@@ -256,8 +280,11 @@ def run_parallel_build_check(blocks_dir, output_dir, block_range=None, max_worke
     
     # Save summary
     summary_file = output_path / "build_summary.json"
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        summary_file.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+    else:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
     
     # Print final summary
     log_message("=" * 50)
@@ -19,16 +19,26 @@ import argparse
 import json
 import os
 import sys
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import orjson  # 可选：更快的 JSON 解析
+except ImportError:
+    orjson = None  # type: ignore
+
+WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # 并发写 Lean 文件的线程数
 
 
 def load_json(path: str) -> List[Dict[str, Any]]:
-    with open(path, 'r', encoding='utf-8') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"JSON 解析失败: {e}", file=sys.stderr)
-            sys.exit(1)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
+    except json.JSONDecodeError as e:
+        print(f"JSON 解析失败: {e}", file=sys.stderr)
+        sys.exit(1)
     if not isinstance(data, list):
         print("JSON 顶层应为数组(list)", file=sys.stderr)
         sys.exit(1)
@@ -43,16 +53,24 @@ def make_filename(index: int) -> str:
     return f"Block_{index:03d}.lean"
 
 
-def write_block(outdir: str, index: int, content: str, overwrite: bool) -> str:
+def write_block(outdir: str, index: int, content: str, overwrite: bool) -> Tuple[str, bool]:
+    """写出一个 block 文件，返回 (路径, 是否写入)；已存在且不覆盖时跳过。"""
     filename = make_filename(index)
     dst = os.path.join(outdir, filename)
-    if os.path.exists(dst) and not overwrite:
-        print(f"跳过已存在: {filename}")
-        return dst
-    with open(dst, 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"写入: {filename} ({len(content)} bytes)")
-    return dst
+    # 不覆盖时用 O_EXCL 让 open 本身判断是否已存在，省去单独的 exists() 探测
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if overwrite else os.O_EXCL)
+    try:
+        fd = os.open(dst, flags, 0o644)
+    except FileExistsError:
+        return dst, False
+    # 内容一次编码、直接 os.write，不经过文本/缓冲 IO 层
+    try:
+        view = memoryview(content.encode('utf-8'))
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return dst, True
 
 
 def main() -> None:
@@ -67,10 +85,13 @@ def main() -> None:
     ensure_dir(args.outdir)
 
     idx = args.start
-    exported = 0
     first_file = None
     last_file = None
 
+    # 先按顺序整理出要写的块（不做 IO），再交给线程池并发写入；
+    # notes 每条记录一项：警告文本，或 None 表示 tasks 中的下一块，保证日志顺序不变
+    tasks: List[Tuple[int, str]] = []
+    notes: List[Optional[str]] = []
     for obj in items:
         stmt = obj.get('main theorem statement')
         if not stmt or not isinstance(stmt, str) or stmt.strip() == '':
@@ -80,16 +101,31 @@ def main() -> None:
                     stmt = obj[alt]
                     break
         if not stmt or not isinstance(stmt, str) or stmt.strip() == '':
-            print(f"警告: 跳过一条记录（缺少 main theorem statement）: {obj.get('id', '?')}")
+            notes.append(f"警告: 跳过一条记录（缺少 main theorem statement）: {obj.get('id', '?')}")
             continue
-        path = write_block(args.outdir, idx, stmt, args.overwrite)
-        if first_file is None:
-            first_file = os.path.basename(path)
-        last_file = os.path.basename(path)
+        tasks.append((idx, stmt))
+        notes.append(None)
         idx += 1
-        exported += 1
 
-    print(f"完成: 共导出 {exported} 条，范围 {first_file} -> {last_file}")
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as ex:
+        results = ex.map(lambda t: write_block(args.outdir, t[0], t[1], args.overwrite), tasks)
+        pending = iter(tasks)
+        for note in notes:
+            if note is not None:
+                print(note)
+                continue
+            _, stmt = next(pending)
+            path, written = next(results)
+            filename = os.path.basename(path)
+            if written:
+                print(f"写入: {filename} ({len(stmt)} bytes)")
+            else:
+                print(f"跳过已存在: {filename}")
+            if first_file is None:
+                first_file = filename
+            last_file = filename
+
+    print(f"完成: 共导出 {len(tasks)} 条，范围 {first_file} -> {last_file}")
 
 
 if __name__ == '__main__':
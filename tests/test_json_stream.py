@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Tests for FinalJsonConvert/json_stream.py. Run: python3 -m unittest discover -s tests"""
+import json
+import math
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from FinalJsonConvert import json_stream  # type: ignore  # noqa: E402
+
+# Every backend combination that can be exercised here; a missing optional
+# module is simply the None case.
+BACKENDS = [
+    {"ijson": ijson_mod, "orjson": orjson_mod}
+    for ijson_mod in {json_stream.ijson, None}
+    for orjson_mod in {json_stream.orjson, None}
+]
+
+
+class IterRecordsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def write(self, text: str) -> Path:
+        path = self.dir / "input.json"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def records(self, path: Path, backend: dict) -> list:
+        with mock.patch.multiple(json_stream, **backend):
+            return list(json_stream.iter_records(path))
+
+    def test_integers_beyond_64_bits(self):
+        big = 2**63 + 1
+        path = self.write(
+            f'[{{"id": 1}}, {{"id": {big}, "n": -{big}}}, {{"id": 100000000000000000000}}, {{"id": 3}}]'
+        )
+        expected = [{"id": 1}, {"id": big, "n": -big}, {"id": 10**20}, {"id": 3}]
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                got = self.records(path, backend)
+                self.assertEqual(got, expected)
+                self.assertIsInstance(got[2]["id"], int)
+
+    def test_non_finite_numbers(self):
+        path = self.write('[{"a": 1.5}, {"a": NaN, "b": Infinity, "c": 1e400}]')
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                first, second = self.records(path, backend)
+                self.assertEqual(first, {"a": 1.5})
+                self.assertTrue(math.isnan(second["a"]))
+                self.assertEqual(second["b"], math.inf)
+                self.assertEqual(second["c"], math.inf)
+
+    def test_malformed_json_raises(self):
+        path = self.write('[{"id": 1}, {')
+        for backend in BACKENDS:
+            with self.subTest(backend=backend), self.assertRaises(RuntimeError):
+                self.records(path, backend)
+
+
+class DumpsJsonTest(unittest.TestCase):
+    def test_integers_beyond_64_bits(self):
+        obj = {"id": 2**63 + 1, "n": [-(10**20)], "k": "é"}
+        for orjson_mod in {json_stream.orjson, None}:
+            for compact in (False, True):
+                with self.subTest(orjson=orjson_mod, compact=compact), \
+                        mock.patch.object(json_stream, "orjson", orjson_mod):
+                    blob = json_stream.dumps_json(obj, compact=compact)
+                    self.assertEqual(json.loads(blob), obj)
+
+
+if __name__ == "__main__":
+    unittest.main()